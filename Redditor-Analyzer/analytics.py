@@ -0,0 +1,113 @@
+import calendar
+
+import numpy as np
+
+from entries import POST, COMMENT
+
+"""
+Vectorised activity analytics over an EntryColumns.
+
+The columns are viewed as numpy arrays without copying, and every statistic
+comes out of a handful of whole-array operations, so 10k+ entries stay cheap.
+All times are UTC, which is what reddit timestamps are in.
+"""
+
+SECONDS_PER_HOUR = 60 * 60
+SECONDS_PER_DAY = 24 * SECONDS_PER_HOUR
+
+# edges of the gap distribution buckets, in seconds
+GAP_BUCKETS = [
+    0,
+    60,
+    10 * 60,
+    SECONDS_PER_HOUR,
+    6 * SECONDS_PER_HOUR,
+    SECONDS_PER_DAY,
+    7 * SECONDS_PER_DAY,
+    30 * SECONDS_PER_DAY,
+    np.inf,
+]
+
+WEEKDAYS = list(calendar.day_name)  # Monday first, like datetime.weekday()
+
+
+class Analytics:
+    # heatmap: 7 x 24 counts of entries by weekday (Monday = 0) and hour
+    # daily_counts: entries on each day, starting from first_day (days since the epoch)
+    # gaps: seconds between consecutive entries, in time order
+    # gap_histogram: counts of gaps falling in each GAP_BUCKETS interval
+    # subreddit_scores: subreddit name : {"entries", "total", "mean", "max"}
+    # num_posts, num_comments, post_ratio (posts / (posts + comments))
+
+    def __init__(self, entries):
+        created = np.frombuffer(entries.created_utc, dtype=np.float64)
+        score = np.frombuffer(entries.score, dtype=np.int64)
+        subreddit = np.frombuffer(entries.subreddit, dtype=np.uint32)
+        kind = np.frombuffer(entries.kind, dtype=np.int8)
+
+        # hour of day x weekday, the epoch was a Thursday (weekday 3)
+        days = (created // SECONDS_PER_DAY).astype(np.int64)
+        hours = ((created % SECONDS_PER_DAY) // SECONDS_PER_HOUR).astype(np.int64)
+        weekdays = (days + 3) % 7
+        self.heatmap = np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(
+            7, 24
+        )
+
+        # posting rate time series, one bucket per day
+        if len(days):
+            self.first_day = int(days.min())
+            self.daily_counts = np.bincount(days - self.first_day)
+        else:
+            self.first_day = None
+            self.daily_counts = np.zeros(0, dtype=np.int64)
+
+        # inter-activity gaps
+        self.gaps = np.diff(np.sort(created))
+        self.gap_histogram, _ = np.histogram(self.gaps, bins=GAP_BUCKETS)
+
+        # per subreddit score aggregates
+        num_subreddits = len(entries.subreddit_names)
+        counts = np.bincount(subreddit, minlength=num_subreddits)
+        totals = np.bincount(subreddit, weights=score, minlength=num_subreddits)
+        maxes = np.full(num_subreddits, np.iinfo(np.int64).min)
+        np.maximum.at(maxes, subreddit, score)
+
+        self.subreddit_scores = {
+            name: {
+                "entries": int(counts[i]),
+                "total": int(totals[i]),
+                "mean": float(totals[i] / counts[i]),
+                "max": int(maxes[i]),
+            }
+            for i, name in enumerate(entries.subreddit_names)
+            if counts[i]
+        }
+
+        # post / comment ratio
+        self.num_posts = int(np.count_nonzero(kind == POST))
+        self.num_comments = int(np.count_nonzero(kind == COMMENT))
+        total = self.num_posts + self.num_comments
+        self.post_ratio = self.num_posts / total if total else None
+
+    # (weekday name, hour) that has the most entries, or None without entries
+    def busiest_time(self):
+        if not self.heatmap.any():
+            return None
+
+        weekday, hour = np.unravel_index(self.heatmap.argmax(), self.heatmap.shape)
+        return WEEKDAYS[weekday], int(hour)
+
+    def median_gap(self):
+        return float(np.median(self.gaps)) if len(self.gaps) else None
+
+    # json serializable version, for headless output
+    def summary(self):
+        return {
+            "heatmap": self.heatmap.tolist(),
+            "first_day": self.first_day,
+            "daily_counts": self.daily_counts.tolist(),
+            "median_gap": self.median_gap(),
+            "gap_histogram": self.gap_histogram.tolist(),
+            "subreddit_scores": self.subreddit_scores,
+            "post_ratio": self.post_ratio,
+        }
@@ -0,0 +1,174 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from urllib.parse import urlparse
+
+import requests
+
+"""
+Downloads profile pictures into memory, with an optional on-disk cache.
+
+Every download goes through one pooled requests.Session. Cached avatars are stored
+under a hash of their url, next to the ETag / Last-Modified headers they came with,
+so a repeat visit is a conditional request that usually comes back 304 Not Modified.
+The cache is kept under a byte budget, the least recently used avatars are evicted first.
+"""
+
+# shared so connections to reddit's image hosts are kept alive between avatars
+session = requests.Session()
+
+TIMEOUT = 10  # seconds
+CHUNK_SIZE = 16 * 1024
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+IMAGE_TYPES = {
+    ".png": "png",
+    ".jpg": "jpg",
+    ".jpeg": "jpg",
+    "image/png": "png",
+    "image/jpeg": "jpg",
+}
+
+
+# the image type of an avatar, from its url, falling back to the content type
+# pygame uses it as the name hint when decoding from memory
+def image_type(url, content_type=""):
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    if extension in IMAGE_TYPES:
+        return IMAGE_TYPES[extension]
+
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type in IMAGE_TYPES:
+        return IMAGE_TYPES[content_type]
+
+    raise ValueError(f"Unable to determine the filetype of {url}")
+
+
+# streams the response body into memory
+def _read_body(response):
+    buffer = io.BytesIO()
+    for block in response.iter_content(CHUNK_SIZE):
+        buffer.write(block)
+    return buffer.getvalue()
+
+
+# downloads an avatar, returns (bytes, image type)
+def download(url):
+    with session.get(url, stream=True, timeout=TIMEOUT) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "")
+        return _read_body(response), image_type(url, content_type)
+
+
+# writes a file through a temporary one, write(file) writes the contents
+def _replace(filepath, write, mode):
+    temppath = f"{filepath}.{threading.get_ident()}.tmp"
+    with open(temppath, mode) as file:
+        write(file)
+    os.replace(temppath, filepath)
+
+
+class AvatarCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _filepaths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".img", base + ".json"
+
+    def _read(self, url):
+        image_path, meta_path = self._filepaths(url)
+
+        # under the lock, so it can't see one avatar's image with another's metadata
+        with self._lock:
+            try:
+                with open(meta_path, "r") as file:
+                    meta = json.load(file)
+                with open(image_path, "rb") as file:
+                    data = file.read()
+            except (OSError, ValueError):
+                return None, None
+
+            # reading counts as use for the LRU eviction
+            try:
+                os.utime(meta_path)
+            except OSError:
+                pass
+
+        return data, meta
+
+    def _write(self, url, data, meta):
+        image_path, meta_path = self._filepaths(url)
+
+        with self._lock:
+            # written to the side and swapped in so a crash can't leave half a file behind
+            # the metadata goes last, without it the image isn't read
+            _replace(image_path, lambda file: file.write(data), "wb")
+            _replace(meta_path, lambda file: json.dump(meta, file), "w")
+
+            self._evict()
+
+    # removes least recently used avatars until the cache fits in max_bytes
+    def _evict(self):
+        avatars = []
+        total = 0
+
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+
+            meta_path = os.path.join(self.directory, name)
+            image_path = meta_path[: -len(".json")] + ".img"
+            try:
+                meta_stat = os.stat(meta_path)
+                size = meta_stat.st_size + os.stat(image_path).st_size
+            except OSError:
+                continue
+
+            avatars.append((meta_stat.st_mtime, size, meta_path, image_path))
+            total += size
+
+        avatars.sort()
+        while total > self.max_bytes and avatars:
+            _, size, meta_path, image_path = avatars.pop(0)
+            for filepath in (meta_path, image_path):
+                try:
+                    os.remove(filepath)
+                except OSError:
+                    pass
+            total -= size
+
+    # like download(), but revalidates a cached copy instead of downloading it again
+    def fetch(self, url):
+        data, meta = self._read(url)
+
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = session.get(url, headers=headers, stream=True, timeout=TIMEOUT)
+        with response:
+            if response.status_code == 304 and data is not None:
+                return data, meta["type"]
+
+            response.raise_for_status()
+            data = _read_body(response)
+            meta = {
+                "type": image_type(url, response.headers.get("Content-Type", "")),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+
+        self._write(url, data, meta)
+        return data, meta["type"]
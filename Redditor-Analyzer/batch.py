@@ -0,0 +1,178 @@
+import argparse
+from concurrent import futures
+import json
+import os
+import sys
+
+import prawcore
+
+import cache
+import info
+import ratelimit
+import registry
+import subreddits
+import tasks
+from reference import references
+
+"""
+Headless batch analysis, no pygame or pgx involved.
+
+python -m batch usernames.txt --output results.jsonl
+
+Usernames are read one per line from a file, or stdin if none is given (or "-").
+Every result is written as a line of json as soon as it is done. Usernames already
+in the output file are skipped, so an interrupted run picks up where it left off.
+Requests are paced by a ratelimit.RequestScheduler, in its background lane.
+"""
+
+
+class Batch:
+    def __init__(
+        self, reddit, output, workers=4, done=(), history_depth=info.HISTORY_DEPTH
+    ):
+        self.reddit = reddit
+        self.output = output
+        self.workers = workers
+        self.history_depth = history_depth
+        self.done = set(done)
+
+        self.completed = 0
+        self.failed = 0
+
+    # turns a finished Info into the line written out for it
+    def _result(self, username, redditor_info):
+        if not redditor_info.errors:
+            return redditor_info.summary()
+
+        error = redditor_info.errors[0]
+        if isinstance(error, prawcore.exceptions.NotFound):
+            return {"username": username, "error": "not_found"}
+
+        return {"username": username, "error": repr(error)}
+
+    def _write(self, result):
+        self.output.write(json.dumps(result) + "\n")
+        self.output.flush()
+
+        if "error" in result and result["error"] != "not_found":
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    # writes out whichever of the analyses in flight finish first
+    def _write_finished(self, pending):
+        finished, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+
+        for future in finished:
+            username, redditor_info = pending.pop(future)
+            self._write(self._result(username, redditor_info))
+            references.analyses.release(redditor_info)
+
+    # usernames is any iterable, it is consumed lazily so huge inputs stay cheap
+    def run(self, usernames):
+        pending = {}  # future : (username, Info)
+
+        for username in usernames:
+            if username in self.done:
+                continue
+            self.done.add(username)
+
+            # bounded amount of work in flight
+            while len(pending) >= self.workers:
+                self._write_finished(pending)
+
+            redditor_info = references.analyses.acquire(
+                self.reddit.redditor(username),
+                fetch_pic=False,
+                history_depth=self.history_depth,
+                lane=ratelimit.BACKGROUND,
+            )
+            pending[redditor_info.future] = (username, redditor_info)
+
+        while pending:
+            self._write_finished(pending)
+
+
+def _read_usernames(stream):
+    for line in stream:
+        username = line.strip()
+        if username and not username.startswith("#"):
+            yield username
+
+
+# usernames that already have a finished result in a previous output file
+def _read_done(filepath):
+    done = set()
+
+    if not os.path.exists(filepath):
+        return done
+
+    with open(filepath, "r") as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # a line cut off by an interrupted run
+
+            # failures other than nonexistent accounts get retried
+            if result.get("error") in (None, "not_found"):
+                done.add(result["username"])
+
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m batch", description="Analyse redditors without the UI"
+    )
+    parser.add_argument("input", nargs="?", default="-", help="file of usernames")
+    parser.add_argument("-o", "--output", help="jsonl file to append results to")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="analyses at once")
+    parser.add_argument(
+        "-d",
+        "--depth",
+        type=int,
+        default=info.HISTORY_DEPTH,
+        help="history entries analysed per user",
+    )
+    parser.add_argument("--cache-dir", help="directory for the analysis caches")
+    args = parser.parse_args(argv)
+
+    references.scheduler = ratelimit.RequestScheduler()
+    references.reddit = info.create_reddit(references.scheduler)
+    references.analyses = registry.AnalysisRegistry()
+    tasks.set_max_workers(max(tasks.MAX_WORKERS, args.workers * 2))
+
+    if args.cache_dir:
+        references.analysis_cache = cache.AnalysisCache(args.cache_dir)
+        references.subreddit_cache = subreddits.SubredditCache(
+            os.path.join(args.cache_dir, "subreddits.json")
+        )
+    else:
+        references.subreddit_cache = subreddits.SubredditCache()
+
+    done = _read_done(args.output) if args.output else set()
+    output = open(args.output, "a") if args.output else sys.stdout
+    instream = sys.stdin if args.input == "-" else open(args.input, "r")
+
+    batch = Batch(references.reddit, output, args.workers, done, args.depth)
+    try:
+        batch.run(_read_usernames(instream))
+    finally:
+        references.subreddit_cache.save()
+        if output is not sys.stdout:
+            output.close()
+        if instream is not sys.stdin:
+            instream.close()
+
+    stats = references.scheduler.get_stats()
+    print(
+        f"{batch.completed} analysed, {batch.failed} failed, {len(done)} skipped",
+        f"({stats['requests']} requests, {stats['coalesced']} coalesced,",
+        f"{stats['mean_wait']:.2f}s mean wait)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
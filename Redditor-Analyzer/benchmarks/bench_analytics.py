@@ -0,0 +1,96 @@
+import random
+import timeit
+from datetime import datetime
+
+from analytics import Analytics
+from entries import EntryColumns, POST, COMMENT
+
+"""
+Compares analytics.Analytics against the per-entry Python loop it replaces.
+
+python -m benchmarks.bench_analytics
+"""
+
+
+# EntryColumns filled with n made up entries, spread over about two years
+def make_entries(n, num_subreddits=150, seed=0):
+    rng = random.Random(seed)
+    entries = EntryColumns()
+
+    for i in range(num_subreddits):
+        entries._intern_subreddit(f"sub{i}", f"t5_{i:x}")
+
+    now = 1_700_000_000
+    for _ in range(n):
+        entries.created_utc.append(now - rng.random() * 2 * 365 * 24 * 60 * 60)
+        entries.score.append(rng.randint(-20, 2000))
+        entries.subreddit.append(rng.randrange(num_subreddits))
+        entries.kind.append(rng.choice((POST, COMMENT)))
+        entries.length.append(rng.randrange(2000))
+        entries.pinned.append(False)
+
+    return entries
+
+
+# the same statistics, one entry at a time
+def per_entry_loop(entries):
+    heatmap = [[0] * 24 for _ in range(7)]
+    daily = {}
+    scores = {}
+    num_posts = 0
+    num_comments = 0
+
+    for i in range(len(entries)):
+        when = datetime.utcfromtimestamp(entries.created_utc[i])
+        heatmap[when.weekday()][when.hour] += 1
+
+        day = int(entries.created_utc[i] // 86400)
+        daily[day] = daily.get(day, 0) + 1
+
+        name = entries.subreddit_names[entries.subreddit[i]]
+        score = entries.score[i]
+        if name in scores:
+            stats = scores[name]
+            stats["entries"] += 1
+            stats["total"] += score
+            stats["max"] = max(stats["max"], score)
+        else:
+            scores[name] = {"entries": 1, "total": score, "max": score}
+
+        if entries.kind[i] == POST:
+            num_posts += 1
+        else:
+            num_comments += 1
+
+    times = sorted(entries.created_utc)
+    gaps = [b - a for a, b in zip(times, times[1:])]
+
+    return heatmap, daily, scores, gaps, num_posts, num_comments
+
+
+def main():
+    for n in (1_000, 10_000, 50_000):
+        entries = make_entries(n)
+
+        # both have to agree before their timings mean anything
+        heatmap, _, scores, _, num_posts, _ = per_entry_loop(entries)
+        analytics = Analytics(entries)
+        assert analytics.heatmap.tolist() == heatmap
+        assert analytics.num_posts == num_posts
+        assert all(
+            analytics.subreddit_scores[name]["total"] == stats["total"]
+            for name, stats in scores.items()
+        )
+
+        runs = 5
+        loop = min(timeit.repeat(lambda: per_entry_loop(entries), number=1, repeat=runs))
+        vectorised = min(timeit.repeat(lambda: Analytics(entries), number=1, repeat=runs))
+
+        print(
+            f"{n:>6} entries: loop {loop * 1000:8.2f} ms, "
+            f"vectorised {vectorised * 1000:7.2f} ms, {loop / vectorised:5.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import random
+import timeit
+
+from pgx.interpret_coords import interpret_coords, compile_coord, resolve_coords
+
+"""
+Compares resolving compiled Location coordinates against rebuilding their strings
+and eval'ing them every time, the way Location._resolve used to.
+
+python -m benchmarks.bench_location
+"""
+
+COORDS = [
+    5,
+    -7,
+    12,
+    "width",
+    "height+20",
+    "right-10",
+    "bottom-30",
+    "center",
+    "center-40",
+    "width/2",
+    "width/3+5",
+    "height*0.25-3",
+    "left+3",
+]
+ALIGNS = ["left", "right", "center"]
+
+
+# n made up rects, with their aligns
+def make_rects(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        ([rng.choice(COORDS) for _ in range(4)], rng.choice(ALIGNS)) for _ in range(n)
+    ]
+
+
+# Location's old split into numbers and keyword strings
+def split_rect(rect):
+    rect_num = [0, 0, 0, 0]
+    rect_keywords = ["", "", "", ""]
+
+    for i, term in enumerate(rect):
+        try:
+            rect_num[i] = int(term)
+        except:
+            term = "".join(
+                [char if char not in ["+", "-"] else " " + char for char in term]
+            )
+            for subterm in term.split(" "):
+                try:
+                    rect_num[i] += int(subterm)
+                except:
+                    rect_keywords[i] += subterm
+
+    return rect_num, rect_keywords
+
+
+# what every resolve did with them, join them back up and eval them
+def eval_resolve(rect_num, rect_keywords, align, panel_rect):
+    rect = [
+        keyword + "+" + str(num) if keyword else num
+        for num, keyword in zip(rect_num, rect_keywords)
+    ]
+    interpret_coords(rect, align, panel_rect)
+    return rect
+
+
+def compile_rect(rect):
+    compiled = [compile_coord(coord) for coord in rect]
+    return [num for num, _ in compiled], [terms for _, terms in compiled]
+
+
+def main():
+    panel_rect = [10, 20, 333, 271]
+
+    for n in (1_000, 5_000, 20_000):
+        rects = make_rects(n)
+        split = [(*split_rect(rect), align) for rect, align in rects]
+        compiled = [(*compile_rect(rect), align) for rect, align in rects]
+
+        # both have to agree before their timings mean anything
+        for (num, keywords, align), (cnum, terms, _) in zip(split, compiled):
+            old = eval_resolve(num, keywords, align, panel_rect)
+            new = resolve_coords(cnum, terms, align, panel_rect)
+            assert all(abs(a - b) < 1e-9 for a, b in zip(old, new))
+
+        runs = 5
+        evaled = min(
+            timeit.repeat(
+                lambda: [eval_resolve(*args, panel_rect) for args in split],
+                number=1,
+                repeat=runs,
+            )
+        )
+        resolved = min(
+            timeit.repeat(
+                lambda: [resolve_coords(*args, panel_rect) for args in compiled],
+                number=1,
+                repeat=runs,
+            )
+        )
+
+        print(
+            f"{n:>6} locations: eval {evaled * 1000:8.2f} ms, "
+            f"compiled {resolved * 1000:7.2f} ms, {evaled / resolved:5.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
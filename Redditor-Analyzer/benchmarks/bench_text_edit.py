@@ -0,0 +1,82 @@
+import random
+import timeit
+
+import pygame
+
+import pgx
+from pgx import Text
+from benchmarks.bench_wrapping import make_paragraph
+
+"""
+Compares typing into a Text, which wraps and renders again only the lines around the
+edit, against generating the whole Text again for every keystroke.
+
+python -m benchmarks.bench_text_edit
+"""
+
+
+# positions to type at, a few runs of keystrokes at made up places
+def make_keystrokes(text, n, seed=0):
+    rng = random.Random(seed)
+    keystrokes = []
+    position = rng.randint(0, len(text))
+    for _ in range(n):
+        if rng.random() < 0.1:
+            position = rng.randint(0, len(text))
+        keystrokes.append((position, rng.choice("etaoin shrdlu")))
+        position += 1
+        text = text[:position] + keystrokes[-1][1] + text[position:]
+
+    return keystrokes
+
+
+def type_into(text, keystrokes, fresh):
+    for position, char in keystrokes:
+        text.text = text.text[:position] + char + text.text[position:]
+        if fresh:
+            text._wrapped = None
+        text.get_image()
+
+
+def main():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    pgx.font._init()
+
+    for n in (500, 2_000, 8_000):
+        for limit in (300, 1200):
+            paragraph = make_paragraph(n)
+            keystrokes = make_keystrokes(paragraph, 50)
+
+            # both have to agree before their timings mean anything
+            typed = Text(paragraph, 20, font=pgx.font.sourcesanspro)
+            typed.limit = limit
+            type_into(typed, keystrokes, fresh=False)
+            regenerated = Text(typed.text, 20, font=pgx.font.sourcesanspro)
+            regenerated.limit = limit
+            assert typed._lines == regenerated._split_lines()
+            assert pygame.image.tobytes(typed.get_image(), "RGBA") == (
+                pygame.image.tobytes(regenerated.get_image(), "RGBA")
+            )
+
+            def run(fresh):
+                text = Text(paragraph, 20, font=pgx.font.sourcesanspro)
+                text.limit = limit
+                text.get_image()
+                return timeit.timeit(
+                    lambda: type_into(text, keystrokes, fresh), number=1
+                )
+
+            runs = 3
+            full = min(run(True) for _ in range(runs)) / len(keystrokes)
+            incremental = min(run(False) for _ in range(runs)) / len(keystrokes)
+
+            print(
+                f"{n:>6} chars, {limit:>4} px lines: full {full * 1000:7.2f} ms, "
+                f"incremental {incremental * 1000:6.2f} ms per keystroke, "
+                f"{full / incremental:5.1f}x faster"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import random
+import timeit
+
+import pygame
+
+import pgx
+from pgx import Text
+
+"""
+Compares Text._split_lines against the wrapping loop it replaces, which measured
+the whole line again for every word it tried to add.
+
+python -m benchmarks.bench_wrapping
+"""
+
+WORDS = (
+    "the of and to a in is you that it he was for on are as with his they I at be this "
+    "have from or one had by word but not what all were we when your can said there "
+    "use an each which she do how their if will up other about out many then them "
+    "subreddit comment karma upvote moderator https://www.reddit.com/r/learnpython/"
+).split(" ")
+
+
+# a paragraph of about n characters, made up words with a newline now and then
+def make_paragraph(n, seed=0):
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < n:
+        word = rng.choice(WORDS)
+        words.append(word)
+        words.append("\n" if rng.random() < 0.02 else " ")
+        length += len(word) + 1
+
+    return "".join(words)
+
+
+# the same lines, measuring current_line + word for every word
+def remeasuring_loop(text):
+    words = text._split_words()
+
+    lines = []
+    current_line = ""
+    while words:
+        if words[0] == "\n":
+            lines.append(current_line)
+            current_line = ""
+            del words[0]
+
+        else:
+            # straight from freetype, like find_px_length was before it kept shapings
+            l = text.font.Font.get_rect(
+                current_line + words[0], size=text.size, style=text.style
+            ).w
+
+            if text.limit is not False and l > text.limit:
+                if current_line == "":
+                    if len(words[0]) == 1:
+                        current_line += words.pop(0)
+                    else:
+                        words[0:1] = list(words[0])
+                else:
+                    lines.append(current_line)
+                    current_line = ""
+            else:
+                current_line += words.pop(0)
+
+    if current_line:
+        lines.append(current_line)
+
+    return lines
+
+
+def main():
+    pygame.init()
+    pgx.font._init()
+
+    for n in (1_000, 4_000, 16_000):
+        for limit in (300, 1200):
+            text = Text(make_paragraph(n), 20, font=pgx.font.sourcesanspro)
+            text.limit = limit
+
+            # both have to agree before their timings mean anything
+            assert text._split_lines() == remeasuring_loop(text)
+
+            runs = 5
+            loop = min(
+                timeit.repeat(lambda: remeasuring_loop(text), number=1, repeat=runs)
+            )
+            single_pass = min(
+                timeit.repeat(lambda: text._split_lines(), number=1, repeat=runs)
+            )
+
+            print(
+                f"{n:>6} chars, {limit:>4} px lines: remeasuring {loop * 1000:8.2f} ms, "
+                f"single pass {single_pass * 1000:7.2f} ms, "
+                f"{loop / single_pass:5.1f}x faster"
+            )
+
+
+if __name__ == "__main__":
+    main()
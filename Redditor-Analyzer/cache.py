@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import time
+
+"""
+Persistent on-disk cache of redditor analyses.
+
+Each analysed redditor gets one json file, split into field classes that each carry
+the time they were fetched. Every field class has its own time to live, stale values are
+still handed out so the UI can show them instantly while Info refreshes them.
+
+The whole cache is kept under a byte budget, the least recently used files are evicted first.
+"""
+
+# seconds until each field class is considered stale
+DEFAULT_TTLS = {
+    "profile": 30 * 24 * 60 * 60,  # created date, essentially never changes
+    "karma": 60 * 60,
+    "activity": 15 * 60,  # entries summary and subreddit activity
+    "subreddit_size": 24 * 60 * 60,
+}
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+class AnalysisCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, ttls=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        self.ttls = DEFAULT_TTLS.copy()
+        if ttls:
+            self.ttls.update(ttls)
+
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _filepath(self, username):
+        return os.path.join(self.directory, f"{username.lower()}.json")
+
+    def _read(self, username):
+        try:
+            with open(self._filepath(username), "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    # returns a dictionary of field class : {"time": fetched timestamp, "data": ...}
+    # stale field classes are included, use is_stale() to decide whether to refresh
+    def load(self, username):
+        with self._lock:
+            entry = self._read(username)
+
+            # reading counts as use for the LRU eviction
+            if entry:
+                try:
+                    os.utime(self._filepath(username))
+                except OSError:
+                    pass
+
+        return entry
+
+    def is_stale(self, entry, field_class):
+        if field_class not in entry:
+            return True
+
+        return time.time() - entry[field_class]["time"] > self.ttls[field_class]
+
+    # stores one field class of a redditor's analysis, data has to be json serializable
+    def store(self, username, field_class, data):
+        with self._lock:
+            entry = self._read(username)
+            entry[field_class] = {"time": time.time(), "data": data}
+
+            # written to the side and swapped in so a crash can't leave half a file behind
+            filepath = self._filepath(username)
+            temppath = f"{filepath}.{threading.get_ident()}.tmp"
+            with open(temppath, "w") as file:
+                json.dump(entry, file)
+            os.replace(temppath, filepath)
+
+            self._evict()
+
+    def invalidate(self, username):
+        with self._lock:
+            try:
+                os.remove(self._filepath(username))
+            except OSError:
+                pass
+
+    # removes least recently used files until the cache fits in max_bytes
+    def _evict(self):
+        files = []
+        total = 0
+
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+
+            filepath = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+
+            files.append((stat.st_mtime, stat.st_size, filepath))
+            total += stat.st_size
+
+        files.sort()
+        while total > self.max_bytes and files:
+            _, size, filepath = files.pop(0)
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+            total -= size
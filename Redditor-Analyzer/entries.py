@@ -0,0 +1,141 @@
+from array import array
+from collections import Counter
+
+from praw.models import Comment, Submission
+
+"""
+Compact columnar storage of a redditor's history entries.
+
+praw objects carry their whole json payload plus a reference to the client,
+so instead every entry is projected into a row of small typed arrays,
+with subreddits interned into a table and referenced by index.
+"""
+
+POST = 0
+COMMENT = 1
+
+# the per entry columns, in the order they're kept in
+COLUMNS = ("created_utc", "score", "subreddit", "kind", "length", "pinned")
+
+
+class EntryColumns:
+    def __init__(self):
+        # one item per entry in each column
+        self.created_utc = array("d")
+        self.score = array("q")
+        self.subreddit = array("I")  # index into the subreddit table
+        self.kind = array("b")  # POST or COMMENT
+        self.length = array("I")  # characters of body / selftext
+        self.pinned = array("b")
+
+        # subreddit table
+        self.subreddit_names = []
+        self.subreddit_fullnames = []
+        self._subreddit_index = {}  # name : index
+
+    def __len__(self):
+        return len(self.kind)
+
+    def _intern_subreddit(self, name, fullname):
+        index = self._subreddit_index.get(name)
+
+        if index is None:
+            index = len(self.subreddit_names)
+            self._subreddit_index[name] = index
+            self.subreddit_names.append(name)
+            self.subreddit_fullnames.append(fullname)
+
+        return index
+
+    # projects a praw Submission or Comment into the columns, the object can be dropped afterwards
+    # returns whether it was stored, anything else is skipped
+    def append(self, entry):
+        if isinstance(entry, Submission):
+            kind = POST
+            length = len(entry.selftext)
+        elif isinstance(entry, Comment):
+            kind = COMMENT
+            length = len(entry.body)
+        else:
+            return False
+
+        self.created_utc.append(entry.created_utc)
+        self.score.append(entry.score)
+        self.subreddit.append(
+            self._intern_subreddit(entry.subreddit.display_name, entry.subreddit_id)
+        )
+        self.kind.append(kind)
+        self.length.append(length)
+        self.pinned.append(bool(entry.stickied))
+
+        return True
+
+    # appends the first limit entries of another EntryColumns, or all of them
+    def extend(self, other, limit=None):
+        # the other table's subreddit indices, in this table
+        # only the subreddits of the entries taken over get interned
+        remap = {}
+        for i in other.subreddit[:limit]:
+            if i not in remap:
+                remap[i] = self._intern_subreddit(
+                    other.subreddit_names[i], other.subreddit_fullnames[i]
+                )
+
+        for column in COLUMNS:
+            if column == "subreddit":
+                self.subreddit.extend(remap[i] for i in other.subreddit[:limit])
+            else:
+                getattr(self, column).extend(getattr(other, column)[:limit])
+
+    # json serializable version, for the analysis cache
+    def to_dict(self):
+        data = {column: getattr(self, column).tolist() for column in COLUMNS}
+        data["subreddit_names"] = self.subreddit_names
+        data["subreddit_fullnames"] = self.subreddit_fullnames
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        entries = cls()
+        for column in COLUMNS:
+            getattr(entries, column).extend(data[column])
+
+        for name, fullname in zip(data["subreddit_names"], data["subreddit_fullnames"]):
+            entries._intern_subreddit(name, fullname)
+
+        return entries
+
+    # ------------------------------------------------------------------------------------------#
+    #                                         ANALYSIS                                          #
+    # ------------------------------------------------------------------------------------------#
+
+    def count_posts(self):
+        return self.kind.count(POST)
+
+    def count_comments(self):
+        return self.kind.count(COMMENT)
+
+    # the most recent entry that isn't pinned
+    # as {"created_utc", "type", "subreddit"}, or None if there are none
+    def last_activity(self):
+        # pinned posts show up at the top of new, but they aren't the most recent thing
+        for i in range(len(self)):
+            if not self.pinned[i]:
+                return {
+                    "created_utc": self.created_utc[i],
+                    "type": "post" if self.kind[i] == POST else "comment",
+                    "subreddit": self.subreddit_names[self.subreddit[i]],
+                }
+
+        return None
+
+    # list of [subreddit name, entries there], sorted ascending by entries
+    def subreddit_activity(self):
+        counts = Counter(self.subreddit)
+        activity = [[self.subreddit_names[i], num] for i, num in counts.items()]
+        activity.sort(key=lambda x: x[1])
+        return activity
+
+    # dictionary of subreddit name : fullname
+    def subreddit_ids(self):
+        return dict(zip(self.subreddit_names, self.subreddit_fullnames))
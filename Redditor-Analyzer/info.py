@@ -1,21 +1,61 @@
-import time
+import asyncio
+from collections import namedtuple
+from concurrent import futures
 from datetime import datetime
 from datetime import timedelta
-import requests
+import io
+import queue
 import threading
-import os
+import time
+import traceback
 
 import praw
-import pygame
 
-import pgx
+from analytics import Analytics
+import avatars
+from entries import EntryColumns
+import ratelimit
 from reference import references
+import subreddits as subreddit_meta
+import tasks
 
 """
 Ideas:
 Break down activity over weekdays
 """
 
+HISTORY_DEPTH = 250  # default number of entries analysed per redditor
+LISTING_LIMIT = 1000  # reddit stops serving a listing after about this many entries
+PROGRESS_STEP = 25  # entries between activity_progress events
+
+# events Info publishes to its subscribers, as InfoEvent(type, data)
+# they are published after the attributes they announce are set
+AGE_READY = "age_ready"  # created_utc, created_date, age
+PIC_READY = "pic_ready"  # profile_pic, profile_pic_url
+KARMA_READY = "karma_ready"  # link_karma, comment_karma, total_karma
+ACTIVITY_PROGRESS = "activity_progress"  # data is the number of entries so far
+ACTIVITY_READY = "activity_ready"  # last_activity, num_posts, subreddit_activity...
+SIZES_READY = "sizes_ready"  # subreddit_size
+SUSPENDED = "suspended"
+
+InfoEvent = namedtuple("InfoEvent", ["type", "data"])
+
+
+# the reddit client the app uses, kwargs are passed on to praw (e.g. a different oauth_url)
+# with a ratelimit.RequestScheduler every request it makes goes through the scheduler
+def create_reddit(scheduler=None, **kwargs):
+    if scheduler is not None:
+        kwargs["requestor_class"] = ratelimit.ScheduledRequestor
+        kwargs["requestor_kwargs"] = {"scheduler": scheduler}
+
+    return praw.Reddit(
+        client_id="Cq7lreaXnBTFTA",
+        client_secret=None,
+        user_agent="reddit account analysis tool by u/starbuck5c",
+        **kwargs,
+    )
+
+
 # object to get and store all of the information on the selected redditor
 class Info:
     # redditor is a Redditor object of praw
@@ -27,26 +67,175 @@ class Info:
     # comment_karma (int)
     # link_karma (int)
     # suspended (bool)
-
-    def __init__(self):
-        self.redditor = references.redditor
+    # entries (entries.EntryColumns), analytics (analytics.Analytics), busiest_time (weekday, hour)
+
+    # redditor defaults to references.redditor
+    # fetch_pic = False skips the profile picture, which keeps pygame and pgx out of headless runs
+    # history_depth is how many entries of their history get analysed
+    # lane is the ratelimit lane its requests queue in, see ratelimit.py
+    # incremental = True refreshes a cached analysis with only the entries made since
+    def __init__(
+        self,
+        redditor=None,
+        fetch_pic=True,
+        history_depth=HISTORY_DEPTH,
+        lane=ratelimit.ANALYSIS,
+        incremental=True,
+    ):
+        self.redditor = redditor if redditor is not None else references.redditor
+        self.history_depth = history_depth
+        self.lane = lane
+        self.incremental = incremental
 
         self.suspended = False
-        references.redditor_info = self
-
-        if not getattr(self.redditor, "id", False):
+        self.cancelled = False
+        self.errors = []
+
+        # every value starts out missing, events announce them as they arrive
+        self.created_utc = self.created_date = self.age = None
+        self.profile_pic = self.profile_pic_url = None
+        self.link_karma = self.comment_karma = self.total_karma = None
+        self.entries = self.analytics = self.busiest_time = None
+        self.last_activity = self.num_posts = self.num_comments = None
+        self.subreddits = self.subreddit_activity = self.subreddit_ids = None
+        self.subreddit_size = None
+
+        self._subscribers = []  # (queue.SimpleQueue, notify) of each subscriber
+        self._subscribers_lock = threading.Lock()
+
+        # stale-while-revalidate: anything cached is shown right away,
+        # only the stale or missing field classes get fetched again
+        self.cache = references.analysis_cache
+        cached = self.cache.load(self.redditor.name) if self.cache else {}
+        self._load_cached(cached)
+
+        # everything from here on runs on the shared event loop, see tasks.py
+        self.future = tasks.submit(self._analyse(cached, fetch_pic))
+
+    async def _analyse(self, cached, fetch_pic):
+        ratelimit.set_lane(self.lane)  # only for this task, every analysis has its own
+
+        try:
+            # loading the about page also loads the age, karma and picture url
+            exists = await tasks.blocking(getattr, self.redditor, "id", False)
+        except Exception as e:
+            self._record_error(e)
+            return
+
+        if not exists:
             self.suspended = True
-
-        else:
-            init_methods = [
-                self._find_account_age,
-                self._find_account_pic,
-                self._find_account_karma,
-                self._find_account_activity,
+            self._publish(SUSPENDED)
+            return
+
+        fetches = [self._find_account_pic] if fetch_pic else []
+
+        if self._is_stale(cached, "profile"):
+            fetches.append(self._find_account_age)
+
+        if self._is_stale(cached, "karma"):
+            fetches.append(self._find_account_karma)
+
+        # an analysis of a different depth doesn't count either,
+        # nor one missing a busiest time it has no entries to work out again from
+        activity = cached["activity"]["data"] if "activity" in cached else None
+        if (
+            activity is None
+            or activity.get("history_depth") != self.history_depth
+            or ("busiest_time" not in activity and "entries" not in activity)
+        ):
+            fetches.append(self._find_account_activity)
+        elif self._is_stale(cached, "activity"):
+            # only shallow analyses keep their entries around to be refreshed
+            if self.incremental and "entries" in activity and "fullnames" in activity:
+                fetches.append(lambda: self._refresh_account_activity(cached))
+            else:
+                fetches.append(self._find_account_activity)
+        elif self._is_stale(cached, "subreddit_size"):
+            fetches.append(self._find_subreddit_sizes)
+
+        # praw is blocking, so each fetch runs on the shared pool while the loop waits on all of them
+        results = await asyncio.gather(
+            *[tasks.blocking(fetch) for fetch in fetches], return_exceptions=True
+        )
+
+        for result in results:
+            if isinstance(result, Exception):
+                self._record_error(result)
+
+    # records what went wrong so callers waiting on the analysis can tell
+    def _record_error(self, error):
+        self.errors.append(error)
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+    def is_done(self):
+        return self.future.done()
+
+    # thread-safe queue of the InfoEvents published from here on
+    # anything found before subscribing is already in the attributes
+    # notify is called (from whichever thread) after each event, e.g. to wake the ui
+    def subscribe(self, notify=None):
+        events = queue.SimpleQueue()
+        with self._subscribers_lock:
+            self._subscribers.append((events, notify))
+        return events
+
+    def unsubscribe(self, events):
+        with self._subscribers_lock:
+            self._subscribers = [
+                subscriber
+                for subscriber in self._subscribers
+                if subscriber[0] is not events
             ]
 
-            init_threads = [threading.Thread(target=method) for method in init_methods]
-            [thread.start() for thread in init_threads]
+    def _publish(self, event_type, data=None):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+
+        for events, notify in subscribers:
+            events.put(InfoEvent(event_type, data))
+            if notify:
+                notify()
+
+    # stops the analysis, fetches already running stop at the next entry of their history
+    # nothing found after cancelling is stored in the cache
+    def cancel(self):
+        self.cancelled = True
+        self.future.cancel()
+
+    # blocks until every fetch has finished, returns whether all of them succeeded
+    def wait(self, timeout=None):
+        futures.wait([self.future], timeout)
+        return not self.errors
+
+    # json serializable summary of everything found, for headless output
+    def summary(self):
+        subreddit_activity = self.subreddit_activity or []
+        subreddit_size = self.subreddit_size or []
+
+        return {
+            "username": self.redditor.name,
+            "suspended": self.suspended,
+            "created_utc": self.created_utc,
+            "link_karma": self.link_karma,
+            "comment_karma": self.comment_karma,
+            "num_posts": self.num_posts,
+            "num_comments": self.num_comments,
+            "history_depth": self.history_depth,
+            "last_activity": (
+                None
+                if not self.last_activity or self.last_activity["time"] == "never"
+                else {
+                    "created_utc": self.last_activity["created_utc"],
+                    "type": self.last_activity["type"],
+                    "subreddit": self.last_activity["subreddit"],
+                }
+            ),
+            "subreddit_activity": [
+                [sub.display_name, num] for sub, num in subreddit_activity
+            ],
+            "subreddit_size": [[sub.display_name, num] for sub, num in subreddit_size],
+            "analytics": self.analytics.summary() if self.analytics else None,
+        }
 
     def __getattr__(self, attribute):
         if attribute in self.__dict__:
@@ -54,97 +243,268 @@ class Info:
         else:
             return None
 
+    def _is_stale(self, cached, field_class):
+        return not self.cache or self.cache.is_stale(cached, field_class)
+
+    def _store(self, field_class, data):
+        if self.cache and not self.cancelled:
+            self.cache.store(self.redditor.name, field_class, data)
+
+    # fills in the attributes from a cache entry, see cache.AnalysisCache
+    def _load_cached(self, cached):
+        if "profile" in cached:
+            self._set_account_age(cached["profile"]["data"]["created_utc"])
+
+        if "karma" in cached:
+            data = cached["karma"]["data"]
+            self._set_account_karma(data["link_karma"], data["comment_karma"])
+
+        if "activity" in cached:
+            data = cached["activity"]["data"]
+            self.subreddit_ids = data["subreddit_ids"]
+            self.busiest_time = data.get("busiest_time")
+            if "entries" in data:
+                self.analytics = Analytics(EntryColumns.from_dict(data["entries"]))
+                # entries cached without it have what it takes to work it out again
+                if "busiest_time" not in data:
+                    self.busiest_time = self.analytics.busiest_time()
+            self._set_account_activity(
+                data["num_posts"],
+                data["num_comments"],
+                data["last_activity"],
+                data["subreddit_activity"],
+            )
+
+        if "subreddit_size" in cached:
+            self._set_subreddit_sizes(cached["subreddit_size"]["data"])
+
     def _find_account_age(self):
         created_timestamp = self.redditor.created_utc
+        self._set_account_age(created_timestamp)
+        self._store("profile", {"created_utc": created_timestamp})
 
+    def _set_account_age(self, created_timestamp):
+        self.created_utc = created_timestamp
         self.created_date = datetime.utcfromtimestamp(created_timestamp)
         self.age = datetime.utcnow() - self.created_date
+        self._publish(AGE_READY)
 
     def _find_account_pic(self):
-        pic_url = self.redditor.icon_img
-
-        extensions = {".png": 0, ".jpg": 0, ".jpeg": 0}
-
-        for extension in extensions:
-            if extension in pic_url:
-                extensions[extension] = 1
-
-        if sum(extensions.values()) > 1:
-            raise ValueError("Unable to determine correct filetype (found multiple)")
-
-        if sum(extensions.values()) == 0:
-            raise ValueError("Unable to determine correct filetype (found none)")
+        # imported here so headless analysis never loads pygame
+        import pygame
 
-        for extension in extensions:
-            if extensions[extension] == 1:
-                pic_type = extension
-                break
-
-        if not os.path.isdir(pgx.path.handle("data/temp")):
-            os.mkdir(pgx.path.handle("data/temp"))
-
-        with open(pgx.path.handle(f"data/temp/profile{pic_type}"), "wb") as handle:
-            response = requests.get(pic_url, stream=True)
-
-            if not response.ok:
-                print(response)
-
-            for block in response.iter_content(1024):
-                if not block:
-                    break
+        pic_url = self.redditor.icon_img
+        self.profile_pic_url = pic_url
 
-                handle.write(block)
+        if references.avatar_cache:
+            data, pic_type = references.avatar_cache.fetch(pic_url)
+        else:
+            data, pic_type = avatars.download(pic_url)
 
-        self.profile_pic = pgx.image.load(f"data/temp/profile{pic_type}").convert()
+        # decoded straight from memory, the type tells pygame which decoder to use
+        self.profile_pic = pygame.image.load(io.BytesIO(data), f"profile.{pic_type}")
+        self.profile_pic = self.profile_pic.convert()
+        self._publish(PIC_READY)
 
     def _find_account_karma(self):
-        self.comment_karma = self.redditor.comment_karma
-        self.link_karma = self.redditor.link_karma
+        link_karma = self.redditor.link_karma
+        comment_karma = self.redditor.comment_karma
+        self._set_account_karma(link_karma, comment_karma)
+        self._store(
+            "karma", {"link_karma": link_karma, "comment_karma": comment_karma}
+        )
+
+    def _set_account_karma(self, link_karma, comment_karma):
+        self.comment_karma = comment_karma
+        self.link_karma = link_karma
         self.total_karma = self.link_karma + self.comment_karma
+        self._publish(KARMA_READY)
+
+    # streams every entry of the redditor's history up to history_depth, without repeats
+    # reddit caps each listing at about 1000 entries, so deeper crawls walk several of them
+    def _iter_history(self):
+        listings = [
+            lambda: self.redditor.new(limit=None),
+            lambda: self.redditor.comments.new(limit=None),
+            lambda: self.redditor.submissions.new(limit=None),
+            lambda: self.redditor.top(time_filter="all", limit=None),
+            lambda: self.redditor.controversial(time_filter="all", limit=None),
+        ]
+
+        # new alone is enough for shallow crawls
+        if self.history_depth <= LISTING_LIMIT:
+            listings = [lambda: self.redditor.new(limit=self.history_depth)]
+
+        seen = set()  # fullnames, the entries themselves end up in an EntryColumns
+        for listing in listings:
+            for entry in listing():
+                if self.cancelled:
+                    return
+
+                if entry.fullname in seen:
+                    continue
+                seen.add(entry.fullname)
+
+                yield entry
+
+                if len(seen) >= self.history_depth:
+                    return
 
     def _find_account_activity(self):
-        self.entries = []
-        subreddits = {}
-        self.num_posts = 0
-        self.num_comments = 0
-
-        first_entry = True
-
-        for entry in self.redditor.new(limit=250):
-            self.entries.append(entry)
-
-            # pinned posts show up at the top of new, but they aren't the most recent thing
-            # tested out using the .stickied attribute
-            if first_entry and not entry.stickied:
-                when = datetime.utcnow() - datetime.utcfromtimestamp(entry.created_utc)
-                self.last_activity = {"time": when, "item": entry}
-                first_entry = False
-
-            if entry.subreddit in subreddits:
-                subreddits[entry.subreddit] += 1
-            else:
-                subreddits[entry.subreddit] = 1
-
-            t = type(entry)
-            if t == praw.models.reddit.submission.Submission:
-                self.num_posts += 1
-            elif t == praw.models.reddit.comment.Comment:
-                self.num_comments += 1
-            else:
-                print(f"Unrecognized type {t}")
+        # deep crawls take hundreds of requests, they shouldn't hold up anything else
+        if self.history_depth > LISTING_LIMIT:
+            ratelimit.set_lane(max(self.lane, ratelimit.BACKGROUND))
+
+        entries = EntryColumns()
+        self.entries = entries  # its length is read live by the UI
+        fullnames = []
+
+        for entry in self._iter_history():
+            # fullnames have to stay in step with the columns
+            if not entries.append(entry):
+                continue
+            fullnames.append(entry.fullname)
+            if len(entries) % PROGRESS_STEP == 0:
+                self._publish(ACTIVITY_PROGRESS, len(entries))
+
+        # a partial history would be cached as if it were the whole thing
+        if self.cancelled:
+            return
+
+        self._analyse_entries(entries, fullnames)
+        self._find_subreddit_sizes()
+
+    # pages new only until it reaches the newest entries the cached analysis has,
+    # then merges those new entries into the cached ones
+    def _refresh_account_activity(self, cached):
+        activity = cached["activity"]["data"]
+        # every cached entry, so an old one showing up again isn't counted twice
+        known = set(activity["fullnames"])
+
+        entries = EntryColumns()
+        self.entries = entries
+        fullnames = []
+
+        for entry in self.redditor.new(limit=self.history_depth):
+            if self.cancelled:
+                return
+
+            if entry.fullname in known:
+                # pinned entries stay at the top, the ones made since come after them
+                if entry.stickied:
+                    continue
+                break
 
-        if self.last_activity == None:
+            if not entries.append(entry):
+                continue
+            fullnames.append(entry.fullname)
+            if len(entries) % PROGRESS_STEP == 0:
+                self._publish(ACTIVITY_PROGRESS, len(entries))
+
+        # the window stays history_depth entries, the oldest ones drop out of it
+        previous = EntryColumns.from_dict(activity["entries"])
+        limit = max(self.history_depth - len(entries), 0)
+        entries.extend(previous, limit)
+        fullnames += activity["fullnames"][:limit]
+
+        self._analyse_entries(entries, fullnames)
+
+        # only subreddits without a known size get resolved
+        known_sizes = {}
+        if not self._is_stale(cached, "subreddit_size"):
+            known_sizes = dict(cached["subreddit_size"]["data"])
+        self._find_subreddit_sizes(known_sizes)
+
+    # fills in and caches everything worked out from a redditor's entries
+    # fullnames are the fullnames of the entries, in the same order
+    def _analyse_entries(self, entries, fullnames):
+        last_activity = entries.last_activity()
+        subreddit_activity = entries.subreddit_activity()
+        num_posts = entries.count_posts()
+        num_comments = entries.count_comments()
+
+        self.analytics = Analytics(entries)
+        self.busiest_time = self.analytics.busiest_time()
+
+        self.subreddit_ids = entries.subreddit_ids()
+        self._set_account_activity(
+            num_posts, num_comments, last_activity, subreddit_activity
+        )
+
+        data = {
+            "num_posts": num_posts,
+            "num_comments": num_comments,
+            "last_activity": last_activity,
+            "subreddit_activity": subreddit_activity,
+            "subreddit_ids": self.subreddit_ids,
+            "history_depth": self.history_depth,
+            "busiest_time": self.busiest_time,
+        }
+        # deep crawls mix several listings, new alone can't refresh them
+        if self.history_depth <= LISTING_LIMIT:
+            data["entries"] = entries.to_dict()
+            data["fullnames"] = fullnames
+        self._store("activity", data)
+
+    # last_activity is None or {"created_utc", "type", "subreddit"}
+    # subreddit_activity is a list of [subreddit name, events there]
+    def _set_account_activity(
+        self, num_posts, num_comments, last_activity, subreddit_activity
+    ):
+        if last_activity is None:
             self.last_activity = {"time": "never"}
-
-        self.subreddits = list(subreddits.keys())
-
+        else:
+            when = datetime.utcnow() - datetime.utcfromtimestamp(
+                last_activity["created_utc"]
+            )
+            self.last_activity = {
+                "time": when,
+                "created_utc": last_activity["created_utc"],
+                "type": last_activity["type"],
+                "subreddit": last_activity["subreddit"],
+            }
+
+        self.num_posts = num_posts
+        self.num_comments = num_comments
+
+        subreddit_activity = [
+            (references.reddit.subreddit(name), num) for name, num in subreddit_activity
+        ]
+        self.subreddits = [sub for sub, _ in subreddit_activity]
+        self.subreddit_activity = subreddit_activity
+        self._publish(ACTIVITY_READY)
+
+    # known_sizes is a dictionary of subreddit name : members that doesn't need resolving
+    def _find_subreddit_sizes(self, known_sizes=None):
+        known_sizes = known_sizes or {}
+
+        # sizes are resolved in bulk rather than lazily one subreddit at a time
+        sizes = subreddit_meta.resolve_subscribers(
+            references.reddit,
+            [
+                fullname
+                for name, fullname in self.subreddit_ids.items()
+                if name not in known_sizes
+            ],
+            references.subreddit_cache,
+        )
+
+        subreddit_size = []
+        for name, fullname in self.subreddit_ids.items():
+            if name in known_sizes:
+                subreddit_size.append((name, known_sizes[name]))
+            elif fullname in sizes:
+                subreddit_size.append((name, sizes[fullname]))
+
+        self._set_subreddit_sizes(subreddit_size)
+        self._store("subreddit_size", subreddit_size)
+
+    # subreddit_size is a list of [subreddit name, members]
+    def _set_subreddit_sizes(self, subreddit_size):
         # sorting subreddits into a list [(sub, members)], sorting by size
-        subsorted = self.subreddits
-        subsorted = [(sub, sub.subscribers) for sub in subsorted]
+        subsorted = [
+            (references.reddit.subreddit(name), size) for name, size in subreddit_size
+        ]
         subsorted.sort(key=lambda x: x[1])
         self.subreddit_size = subsorted
-
-        # sorting subreddits into a list [(sub, events there)], sorting by event num
-        subsorted = list(subreddits.items())
-        subsorted.sort(key=lambda x: x[1])
-        self.subreddit_activity = subsorted
+        self._publish(SIZES_READY)
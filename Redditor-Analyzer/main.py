@@ -1,4 +1,3 @@
-import praw
 import traceback
 import pygame
 from datetime import datetime
@@ -7,6 +6,12 @@ import platform
 import pgx
 
 import scenes
+import info
+import avatars
+import cache
+import subreddits
+import ratelimit
+import registry
 from reference import references
 
 width = 800
@@ -27,30 +32,43 @@ def main():
     pygame.display.set_caption("Redditor Analyzer")
     pygame.display.set_icon(pygame.image.load("data/magnifying_glass.png"))
 
-    reddit = praw.Reddit(client_id = "Cq7lreaXnBTFTA",
-                         client_secret = None,
-                         user_agent = "reddit account analysis tool by u/starbuck5c")
-    references.reddit = reddit
+    references.scheduler = ratelimit.RequestScheduler()
+    references.reddit = info.create_reddit(references.scheduler)
+    references.analysis_cache = cache.AnalysisCache(pgx.path.handle("data/cache"))
+    references.avatar_cache = avatars.AvatarCache(pgx.path.handle("data/avatars"))
+    references.subreddit_cache = subreddits.SubredditCache(
+        pgx.path.handle("data/subreddits.json")
+    )
+    references.analyses = registry.AnalysisRegistry()
 
     references.active_scenes = [scenes.EnterUsername()]
 
+    # ui trees are laid out once and reused until something moves
+    pgx.ui.layout.enable()
+    # only what changed gets redrawn and sent to the window
+    pgx.ui.dirty.enable()
+    # and while nothing changes ticks slow down, see pgx.time
+    pgx.time.set_adaptive(True)
+
     while True:
-        screen.fill((10, 130, 190))
         bg.display()
         pgx.tick(144)
 
         for scene in references.active_scenes:
             scene.run()
-        
-        pygame.display.flip()
+
+        pygame.display.update(pgx.ui.dirty.render((10, 130, 190)))
         for event in pgx.events.get():
             if event.type == pygame.QUIT:
+                # subreddit sizes are only saved now and then while running
+                references.subreddit_cache.save()
                 pygame.quit()
                 raise SystemExit
             
             if event.type == pygame.VIDEORESIZE:
                 screen = pygame.display.set_mode(event.size, screen.get_flags())
                 pgx.scale.apply()
+                pgx.ui.dirty.mark_all()
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@ import copy
 
 import pygame
 
-from pgx.interpret_coords import interpret_coords
+from pgx.interpret_coords import compile_coord, resolve_coords
 from pgx.scale import scale
 
 from pgx.Rect import Rect as pgx_rect
@@ -10,6 +10,9 @@ from pygame import Rect as pygame_rect
 
 
 class Location:
+    # counts edits to any location, so pgx.ui.layout knows when to solve again
+    _edits = 0
+
     def __init__(self, *args, **kwargs):
         # processing alternative forms of init
         if len(args) == 0:
@@ -64,40 +67,16 @@ class Location:
     # ------------------------------------------------------------------------------------------#
 
     # method to take formatted rects with keywords in them and split them into
-    # their keywords and numbers separately
+    # their numbers and their keywords, compiled once so resolving needs no parsing
     def _uncombine_rect(self, rect):
         rect_num = [0, 0, 0, 0]
-        rect_keywords = ["", "", "", ""]
+        rect_keywords = [None, None, None, None]
 
         for i, term in enumerate(rect):
-            try:
-                rect_num[i] = int(term)
-            except:
-                term = "".join(
-                    [char if char not in ["+", "-"] else " " + char for char in term]
-                )
-                subterms = term.split(" ")
-
-                for subterm in subterms:
-                    try:
-                        rect_num[i] += int(subterm)
-                    except:
-                        rect_keywords[i] += subterm
+            rect_num[i], rect_keywords[i] = compile_coord(term)
 
         return self.rect_class(rect_num), rect_keywords
 
-    # method that reconstitutes a formatted rect out of the keywords and numbers
-    # extracted earlier
-    def _combine_rect(self, rect_num, rect_keywords):
-        rect_output = ["", "", "", ""]
-        for i, (num, keyword) in enumerate(zip(rect_num, rect_keywords)):
-            if keyword:
-                rect_output[i] = keyword + "+" + str(num)
-            else:
-                rect_output[i] = num
-
-        return rect_output
-
     def _scale_rect(self, rect, pos_scale, size_scale):
         rect.x *= pos_scale
         rect.y *= pos_scale
@@ -117,17 +96,19 @@ class Location:
             self.get_ui_scale(),
             self.get_ui_scale() * self.get_user_scale(),
         )
-        current_rect_formatted = self._combine_rect(
-            current_rect_num, self._base_rect_keywords
-        )
 
         scaled_panel_dim = self._base_panel_dim.copy()
         self._scale_rect(scaled_panel_dim, self.get_ui_scale(), self.get_ui_scale())
 
-        interpret_coords(current_rect_formatted, self.get_align(), scaled_panel_dim)
+        current_rect = resolve_coords(
+            current_rect_num,
+            self._base_rect_keywords,
+            self.get_align(),
+            scaled_panel_dim,
+        )
         # current resolved rect uses pygame_rects because resolved coordinates are used on the screen
         # so sub pixel detail doesn't matter anymore
-        self._current_rect_resolved = pygame_rect(current_rect_formatted)
+        self._current_rect_resolved = pygame_rect(current_rect)
 
         # generating self._base_rect_resolved
         # gives UI scaling something firm to grab (in pgx.ui.UI.display())
@@ -135,14 +116,14 @@ class Location:
         base_rect_num_scaled = self._base_rect_num.copy()
         self._scale_rect(base_rect_num_scaled, 1, self.get_user_scale())
 
-        base_rect_formatted = self._combine_rect(
-            base_rect_num_scaled, self._base_rect_keywords
-        )
-
-        interpret_coords(
-            base_rect_formatted, self.get_align(), self.get_parent_context(), True
+        base_rect = resolve_coords(
+            base_rect_num_scaled,
+            self._base_rect_keywords,
+            self.get_align(),
+            self.get_parent_context(),
+            True,
         )
-        self._base_rect_resolved = self.rect_class(base_rect_formatted)
+        self._base_rect_resolved = self.rect_class(base_rect)
 
     # ------------------------------------------------------------------------------------------#
     #                                 PANEL_DIM CONTEXT INTERFACE                               #
@@ -156,6 +137,7 @@ class Location:
 
         if value != self._base_panel_dim:
             self.changed = True
+            Location._edits += 1
 
         self._base_panel_dim = value
 
@@ -171,6 +153,7 @@ class Location:
         """Set the align (“left”, “right”, or “center”)."""
         if align != self.align:
             self.changed = True
+            Location._edits += 1
 
         self.align = align
 
@@ -184,6 +167,7 @@ class Location:
     def set_ui_scale(self, value: float) -> None:
         if value != self._ui_scale:
             self.changed = True
+            Location._edits += 1
 
         self._ui_scale = value
 
@@ -193,6 +177,7 @@ class Location:
     def set_user_scale(self, value: float) -> None:
         if value != self._user_scale:
             self.changed = True
+            Location._edits += 1
 
         self._user_scale = value
 
@@ -227,7 +212,10 @@ class Location:
     }
 
     def __getattr__(self, name):
-        if name in Location.rect_attributes or name in Location.rect_methods:
+        if name in Location.rect_attributes:
+            return getattr(self._base_rect_num, name)
+        if name in Location.rect_methods:
+            Location._edits += 1  # most likely about to move it
             return getattr(self._base_rect_num, name)
 
         raise AttributeError(
@@ -236,7 +224,10 @@ class Location:
 
     def __setattr__(self, name, value):
         if name in Location.rect_attributes:
+            old = getattr(self._base_rect_num, name)
             setattr(self._base_rect_num, name, value)
+            if getattr(self._base_rect_num, name) != old:
+                Location._edits += 1
         else:
             self.__dict__[name] = value
 
@@ -1,3 +1,5 @@
+from array import array
+from bisect import bisect_left, bisect_right
 import copy
 import string
 from typing import Union
@@ -6,6 +8,128 @@ import pygame.freetype
 
 from pgx.font import font
 
+"""
+Per character metrics are only worked out when something asks for them, like
+Selectable and InputBox do, and are kept as parallel arrays rather than a Rect or
+tuple per character. get_rect_metrics() and friends hand out sequence views that
+make the Rects and tuples as they are indexed.
+"""
+
+
+# length of the start a and b have in common, compared in halves rather than by char
+def _common_prefix(a, b):
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+# the per character metrics of a generated Text
+class _TextMetrics:
+    def __init__(self, textobj):
+        # the rect metrics, x0 and x1 are the left and right of each character's rect
+        self.x0 = array("i")
+        self.x1 = array("i")
+        self.line = array("i")
+        self.tops = []
+        self.bottoms = []
+        self.line_starts = []  # index of the first character of every line
+
+        # the rest of the metric tuples, as font.get_metrics() gives them
+        self.metric_x0 = array("d")
+        self.metric_x1 = array("d")
+        self.advance_x = array("d")
+        self.advance_y = array("d")
+
+        for i, (line, rect) in enumerate(zip(textobj._lines, textobj._line_rects)):
+            self.line_starts.append(len(self.x0))
+            self.tops.append(rect.top)
+            self.bottoms.append(rect.bottom)
+
+            # lines that weren't touched by the last edit still have theirs
+            line_metrics = textobj._line_metrics[i]
+            if line_metrics is None:
+                line_metrics = textobj.font.get_metrics(
+                    line, textobj.size, textobj.style
+                )
+                textobj._line_metrics[i] = line_metrics
+            for metric in line_metrics:
+                x0 = metric[0] + rect.x
+                x1 = metric[1] + rect.x
+
+                # sets the last rect to come right up to the current rect
+                if len(self.x0) > self.line_starts[-1]:
+                    self.x1[-1] = int(x0)
+
+                self.x0.append(int(x0))
+                self.x1.append(int(x0) + int(x1 - x0))
+                self.line.append(i)
+
+                self.metric_x0.append(x0)
+                self.metric_x1.append(x1)
+                self.advance_x.append(metric[4])
+                self.advance_y.append(metric[5])
+
+        self.line_starts.append(len(self.x0))
+
+    def rect(self, i):
+        line = self.line[i]
+        top = self.tops[line]
+        return pygame.Rect(
+            self.x0[i], top, self.x1[i] - self.x0[i], self.bottoms[line] - top
+        )
+
+    def metric(self, i):
+        line = self.line[i]
+        return (
+            self.metric_x0[i],
+            self.metric_x1[i],
+            self.tops[line],
+            self.bottoms[line],
+            self.advance_x[i],
+            self.advance_y[i],
+        )
+
+    # every character, or the ones on a line, made into metrics by make
+    def view(self, make, line=None):
+        if line is None:
+            return _MetricsView(make, 0, len(self.x0))
+        return _MetricsView(make, self.line_starts[line], self.line_starts[line + 1])
+
+    def views_byline(self, make):
+        return [self.view(make, line) for line in range(len(self.tops))]
+
+
+# a read only sequence of metrics, made one at a time as they are indexed
+class _MetricsView:
+    def __init__(self, make, start, stop):
+        self._make = make
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("metrics index out of range")
+
+        return self._make(self._start + index)
+
+    def __iter__(self):
+        for i in range(self._start, self._stop):
+            yield self._make(i)
+
 
 class Text:
     # ------------------------------------------------------------------------------------------#
@@ -43,10 +167,11 @@ class Text:
         + [
             "image",
             "rect",
-            "metrics",
-            "metrics_byline",
-            "rect_metrics",
-            "rect_metrics_byline",
+            "_lines",
+            "_line_rects",
+            "_line_metrics",
+            "_metrics",
+            "_wrapped",
         ]
         + ["_changed"]
     )
@@ -144,6 +269,7 @@ class Text:
         self._set_property("align", kwargs)
         self._set_property("spacing", kwargs)
 
+        self._wrapped = None  # what the last generation wrapped, see _rewrap
         self._changed = True
 
     def _set_property(self, name, kwargs):
@@ -167,29 +293,35 @@ class Text:
             self._changed = False
         return self.image
 
-    def get_metrics(self) -> list:
+    # metrics are worked out on the first call after a change, see _TextMetrics
+    def _get_text_metrics(self):
         if self._changed:
             self._generate()
             self._changed = False
-        return self.metrics
+        if self._metrics is None and self.text != "":
+            self._metrics = _TextMetrics(self)
+        return self._metrics
+
+    def get_metrics(self) -> list:
+        metrics = self._get_text_metrics()
+        return metrics and metrics.view(metrics.metric)
 
     def get_metrics_lines(self) -> list:
-        if self._changed:
-            self._generate()
-            self._changed = False
-        return self.metrics_byline
+        metrics = self._get_text_metrics()
+        return metrics and metrics.views_byline(metrics.metric)
 
     def get_rect_metrics(self) -> list:
-        if self._changed:
-            self._generate()
-            self._changed = False
-        return self.rect_metrics
+        metrics = self._get_text_metrics()
+        return metrics and metrics.view(metrics.rect)
 
     def get_rect_metrics_byline(self) -> list:
-        if self._changed:
-            self._generate()
-            self._changed = False
-        return self.rect_metrics_byline
+        metrics = self._get_text_metrics()
+        return metrics and metrics.views_byline(metrics.rect)
+
+    metrics = property(get_metrics)
+    metrics_byline = property(get_metrics_lines)
+    rect_metrics = property(get_rect_metrics)
+    rect_metrics_byline = property(get_rect_metrics_byline)
 
     def __len__(self):
         return len(self.text)
@@ -206,104 +338,250 @@ class Text:
 
     WHITESPACE = set(string.whitespace)
 
+    # joined extents this close to the limit get the line measured as a whole instead,
+    # fractional widths (like a scaled CustomFont's) add up with different rounding
+    LIMIT_TOLERANCE = 1e-6
+
     # splits text into a list of words
     # in runs of whitespace, each char counts as its own word
     def _split_words(self):
-        words = []
+        return [word for _, word in self._iter_words()]
+
+    # the words from offset start on, with the offsets they start at
+    def _iter_words(self, start=0):
         text = self.text
-        lastcut = 0
-        for i in range(1, len(text)):
+        lastcut = start
+        for i in range(start + 1, len(text)):
             char = text[i]
             lastchar = text[i - 1]
 
             if char in self.WHITESPACE or lastchar in self.WHITESPACE:
-                words.append(text[lastcut:i])
+                yield lastcut, text[lastcut:i]
                 lastcut = i
 
-        words.append(text[lastcut:])
-
-        return words
+        yield lastcut, text[lastcut:]
 
     # splits text into a list of lines, applying the limit setting
     def _split_lines(self):
-        words = self._split_words()
-
+        return self._wrap()[0]
+
+    # splits text into lines from offset start on, which has to start a line
+    # a single pass over the words, each measured once by its font extent (see
+    # font.Font.get_extent), and joined onto the line's extent without remeasuring it
+    # returns the lines and the offsets they start at, stop(offset) is asked at the start
+    # of every line after the first and if it returns True the lines end there
+    def _wrap(self, start=0, stop=None):
         lines = []
-        current_line = ""
-        while words:
-            if words[0] == "\n":
-                lines.append(current_line)
-                current_line = ""
-                del words[0]
-
+        starts = []
+
+        # without a limit only newlines split lines
+        if self.limit is False:
+            for line in self.text[start:].split("\n"):
+                if starts and stop and stop(start):
+                    return lines, starts
+                lines.append(line)
+                starts.append(start)
+                start += len(line) + 1
+
+            if lines[-1] == "":
+                lines.pop()
+                starts.pop()
+            return lines, starts
+
+        words = self._iter_words(start)
+
+        # looked up once, this runs for every word
+        size, style, limit = self.size, self.style, self.limit
+        get_extent = self.font.get_extent
+        join_extents = self.font.join_extents
+        get_extent_length = self.font.get_extent_length
+
+        line = []  # words of the current line
+        line_extent = (0, None, None)
+        line_start = start
+
+        # cursors into the words, char is set while a word is fed character by character
+        offset, word_chars = next(words)
+        char = None
+
+        while word_chars:
+            word = word_chars if char is None else word_chars[char]
+
+            if word == "\n":
+                lines.append("".join(line))
+                starts.append(line_start)
+                line = []
+                line_extent = (0, None, None)
+                line_start = offset + 1
+
+                if stop and stop(line_start):
+                    return lines, starts
+                offset, word_chars = next(words, (None, ""))
+                continue
+
+            extent = get_extent(word, size, style)
+            if extent is None or line_extent is None:
+                # the style doesn't add up, measures the whole line instead
+                extent = line_extent = None
+                l = self.font.find_px_length("".join(line) + word, size, style)
             else:
-                l = self.font.find_px_length(
-                    current_line + words[0], self.size, self.style
-                )
-
-                # if adding this word goes over the limit...
-                if self.limit is not False and l > self.limit:
-
-                    # if one word is longer than the limit on its own
-                    if current_line == "":
-
-                        # if the word making it go over is a single character
-                        if len(words[0]) == 1:
-                            current_line += words.pop(0)
-
-                        # otherwise atomize the current word into characters
-                        else:
-                            words[0:1] = list(words[0])
-
-                    # normal case
-                    else:
-                        lines.append(current_line)
-                        current_line = ""
-
-                # if there is still more room for words on this line
-                else:
-                    current_line += words.pop(0)
-
-        if current_line:
-            lines.append(current_line)
+                extent = join_extents(line_extent, extent)
+                l = get_extent_length(extent)
+                if abs(l - limit) < self.LIMIT_TOLERANCE:
+                    l = self.font.find_px_length("".join(line) + word, size, style)
+
+            # if adding this word goes over the limit...
+            fits = l <= limit
+            if not fits and not line and len(word) > 1:
+                # one word is longer than the limit on its own
+                # atomize the current word into characters
+                char = 0
+                continue
+
+            if not fits and line:
+                lines.append("".join(line))
+                starts.append(line_start)
+                line = []
+                line_extent = (0, None, None)
+                line_start = offset + (char or 0)
+
+                if stop and stop(line_start):
+                    return lines, starts
+                continue
+
+            # if there is still more room for words on this line
+            # or the word making it go over is a single character
+            line.append(word)
+            if line_extent is not None:
+                line_extent = extent
+
+            if char is not None:
+                char += 1
+                if char < len(word_chars):
+                    continue
+                char = None
+            offset, word_chars = next(words, (None, ""))
+
+        if line:
+            lines.append("".join(line))
+            starts.append(line_start)
+
+        return lines, starts
+
+    # the lines of the text, wrapping again only from around what was edited since the
+    # last generation, and everything known about the lines it didn't have to touch
+    # returns (lines, starts, images, line metrics), None for images and metrics to make
+    def _rewrap(self):
+        text = self.text
+        old = self._wrapped
+        if (
+            old is None
+            or old[0] != self._get_wrap_settings()
+            or old[1] == ""
+            or text == ""
+        ):
+            lines, starts = self._wrap()
+            return lines, starts, [None] * len(lines), [None] * len(lines)
+
+        _, old_text, old_lines, old_starts, old_images, old_metrics = old
+
+        # the edited part, text[prefix:len(text) - suffix] replaced the same of old_text
+        prefix = _common_prefix(old_text, text)
+        most = min(len(old_text), len(text)) - prefix
+        suffix = _common_prefix(old_text[::-1][:most], text[::-1][:most])
+        delta = len(text) - len(old_text)
+
+        # the word the edit touches could join the line before it, and a line that
+        # starts inside an atomized word has to go back to where the word started
+        edit_word = max(prefix - 1, 0)
+        while edit_word > 0 and not self._is_word_start(old_text, edit_word):
+            edit_word -= 1
+        first = max(bisect_right(old_starts, edit_word) - 2, 0)
+        while first > 0 and not self._is_word_start(old_text, old_starts[first]):
+            first -= 1
+
+        # once past the edit, a line starting where an old line did goes on the same
+        resume = []
+
+        def stop(offset):
+            if (
+                offset < len(text) - suffix
+                or not self._is_word_start(text, offset)
+                or not self._is_word_start(old_text, offset - delta)
+            ):
+                return False
+            index = bisect_left(old_starts, offset - delta)
+            if index < len(old_starts) and old_starts[index] == offset - delta:
+                resume.append(index)
+                return True
+            return False
+
+        lines, starts = self._wrap(old_starts[first], stop)
+        new = len(lines)
+        lines = old_lines[:first] + lines
+        starts = old_starts[:first] + starts
+        images = old_images[:first] + [None] * new
+        metrics = old_metrics[:first] + [None] * new
+
+        if resume:
+            index = resume[0]
+            lines += old_lines[index:]
+            starts += [start + delta for start in old_starts[index:]]
+            images += old_images[index:]
+            metrics += old_metrics[index:]
+
+        return lines, starts, images, metrics
+
+    def _is_word_start(self, text, offset):
+        return (
+            offset == 0
+            or offset >= len(text)
+            or text[offset] in self.WHITESPACE
+            or text[offset - 1] in self.WHITESPACE
+        )
 
-        return lines
+    # what the lines depend on, apart from the text
+    def _get_wrap_settings(self):
+        return (
+            self.size,
+            self.font,
+            self.color,
+            self.bgcolor,
+            self.style,
+            self.limit,
+        )
 
     def _generate(self):
+        self._metrics = None
+
         # empty strings
         if self.text == "":
             self.image, self.rect = self.font.render(
                 "", self.size, self.bgcolor, self.color, self.style
             )
-            self.metrics = None
-            self.metrics_byline = None
-            self.rect_metrics = None
-            self.rect_metrics_byline = None
+            self._lines = []
+            self._line_rects = []
+            self._line_metrics = []
+            self._wrapped = None
             return
 
-        images = []
+        lines, starts, images, self._line_metrics = self._rewrap()
         rects = []
-        metrics = []
-        metrics_byline = []
-        rect_metrics = []
-        rect_metrics_byline = []
-
-        for line in self._split_lines():
-            image, rect = self.font.render(
-                line, self.size, self.bgcolor, self.color, self.style
-            )
+
+        for i, line in enumerate(lines):
+            # lines left as they were keep their image
+            if images[i] is None:
+                images[i] = self.font.render(
+                    line, self.size, self.bgcolor, self.color, self.style
+                )[0]
+            rect = images[i].get_rect()
 
             # fixes the line rects as per the spacing setting
             if rects:
                 rects[-1].h *= self.spacing
                 rect.y = rects[-1].bottom
 
-            line_metrics = self.font.get_metrics(line, self.size, self.style)
-
             rects.append(rect)
-            images.append(image)
-            metrics_byline.append(line_metrics)
-            rect_metrics_byline.append([])
 
         # creating overall rectangle out of the line rectangles
         self.rect = rects[0].unionall(rects[1:])
@@ -315,48 +593,26 @@ class Text:
         if len(rects) > 1:
             rects[-1].h *= self.spacing
 
-        # aligning the metrics
-        for i in range(len(metrics_byline)):
-            # fixes the line rects as per the align setting
-            rect = rects[i]
+        # fixes the line rects as per the align setting
+        for rect in rects:
             if self.align == "right":
                 rect.x = self.rect.w - rect.w
             elif self.align == "center":
                 rect.x = self.rect.w / 2 - rect.w / 2
 
-            # fixes the metrics to the line rects
-            line_metrics = metrics_byline[i]
-            for j, metric in enumerate(line_metrics):
-                metric = (
-                    metric[0] + rect.x,
-                    metric[1] + rect.x,
-                    rect.top,
-                    rect.bottom,
-                    metric[4],
-                    metric[5],
-                )
-
-                metrics.append(metric)
-                line_metrics[j] = metric
-
-                # creates a rect version of the metrics
-                rect_metric = pygame.Rect(
-                    metric[0], metric[2], metric[1] - metric[0], metric[3] - metric[2]
-                )
-                rect_metrics.append(rect_metric)
-                rect_metrics_byline[i].append(rect_metric)
-
-                # sets the last rect to come right up to the current rect
-                try:
-                    lm = rect_metrics_byline[i][-2]
-                    lm.width = rect_metric.x - lm.x
-                except IndexError:
-                    pass
-
-        self.metrics = metrics
-        self.metrics_byline = metrics_byline
-        self.rect_metrics = rect_metrics
-        self.rect_metrics_byline = rect_metrics_byline
+        # kept for the metrics, if they are ever asked for
+        self._lines = lines
+        self._line_rects = rects
+
+        # kept for the next generation to start from
+        self._wrapped = (
+            self._get_wrap_settings(),
+            self.text,
+            lines,
+            starts,
+            images,
+            self._line_metrics,
+        )
 
         # uses the area to create a surface to store everything on
         surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
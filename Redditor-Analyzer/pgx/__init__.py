@@ -53,5 +53,9 @@ def tick(*args) -> None:
     # gets the event stuff updated
     events._update()
 
+    # input or a wake up keeps adaptive ticks at the full rate for a while
+    if events.get():
+        time.mark_active()
+
     # gets the keyboard ready to respond
     key._prepare()
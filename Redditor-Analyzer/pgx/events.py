@@ -1,5 +1,7 @@
 import pygame
 
+from pgx.time import time
+
 """
 cool if there was a remove_next(type), which waits until it sees something and removes it
 maybe a remove(event)
@@ -22,7 +24,8 @@ class events:
     @staticmethod
     def _update():
         events._tickevents.clear()
-        for event in pygame.event.get():
+        # an idle tick may have waited on the first of them already
+        for event in time._take_waited_events() + pygame.event.get():
             events._tickevents.append(event)
 
             # left click events are given a clickcount variable to see whether
@@ -1,11 +1,26 @@
+from collections import OrderedDict
 import math
 import string
 
 import pygame
+import pygame.freetype
 
 from pgx import image
 from pgx import path
 
+"""
+Font.render puts lines together out of glyph atlases: every glyph of a font, at a
+size and style, is rasterised once in white onto one surface, and a line is the
+blits of its glyphs, tinted to the text color. That gives the same pixels freetype
+does for the plain and oblique styles over a transparent background, with an opaque
+color. Anything else (strong, underline, backgrounds, glyphs the font doesn't have)
+is rendered by freetype directly. Rendered lines are kept in an LRU cache either way.
+
+Everything measured about a piece of text goes through Font.shape(), which keeps one
+shaped run per text, size and style, so a word measured while wrapping or a line
+measured for rendering and then for its character metrics is only shaped once.
+"""
+
 
 class font:
     @staticmethod
@@ -55,7 +70,142 @@ class font:
 
         return font.CustomFont(char_image, 15, (0, 0, 0), 2)
 
+    # every glyph of a freetype font at a size and style, rasterised on demand in white
+    # and packed in rows onto one surface
+    class _GlyphAtlas:
+        WIDTH = 512
+
+        def __init__(self, freetype_font, size, style):
+            self.font = freetype_font
+            self.size = size
+            self.style = style
+            self.descender = freetype_font.get_sized_descender(size)
+
+            self.surface = pygame.Surface((self.WIDTH, 64), pygame.SRCALPHA)
+            # char : (area on the surface, bearing x, bearing y, advance)
+            # or None for characters the font doesn't have
+            self.glyphs = {}
+
+            # the row glyphs are being added to
+            self._row_x = 0
+            self._row_y = 0
+            self._row_h = 0
+
+        def get(self, char):
+            try:
+                return self.glyphs[char]
+            except KeyError:
+                glyph = self.glyphs[char] = self._add(char)
+                return glyph
+
+        def _add(self, char):
+            metrics = self.font.get_metrics(char, self.size)
+            if not metrics or metrics[0] is None:
+                return None
+
+            image, rect = self.font.render(
+                char, (255, 255, 255), size=self.size, style=self.style
+            )
+            w, h = image.get_size()
+
+            if self._row_x + w > self.WIDTH:
+                self._row_x = 0
+                self._row_y += self._row_h
+                self._row_h = 0
+
+            if self._row_y + h > self.surface.get_height():
+                height = max(self.surface.get_height() * 2, self._row_y + h)
+                surface = pygame.Surface((self.WIDTH, height), pygame.SRCALPHA)
+                surface.blit(self.surface, (0, 0))
+                self.surface = surface
+
+            area = pygame.Rect(self._row_x, self._row_y, w, h)
+            self.surface.blit(image, area)
+
+            self._row_x += w
+            self._row_h = max(self._row_h, h)
+
+            return area, rect.x, rect.y, metrics[0][4]
+
+    # a piece of text shaped by freetype at a size and style, see Font.shape()
+    # everything is measured the first time it's asked for, and then kept
+    class _ShapedRun:
+        def __init__(self, pgx_font, textstr, size, style):
+            self.font = pgx_font
+            self.text = textstr
+            self.size = size
+            self.style = style
+
+            self._metrics = None
+            self._rect = None
+            self._extent = False  # None is an extent too
+
+        # freetype's metrics of every character, None for ones the font doesn't have
+        @property
+        def metrics(self) -> list:
+            if self._metrics is None:
+                # setting STYLE_DEFAULT would leave whatever style was set before
+                style = self.style
+                if style == pygame.freetype.STYLE_DEFAULT:
+                    style = self.font.Font.style
+                self.font.dummy_font.style = style
+                self._metrics = self.font.dummy_font.get_metrics(self.text, self.size)
+            return self._metrics
+
+        # the horizontal advance of every character, None where the metrics are
+        @property
+        def advances(self) -> list:
+            return [None if metric is None else metric[4] for metric in self.metrics]
+
+        # bounding box of the ink, relative to the start of the baseline, y going up
+        # shared by everything using the run, so it shouldn't be changed
+        @property
+        def rect(self) -> pygame.Rect:
+            if self._rect is None:
+                self._rect = self.font.Font.get_rect(
+                    self.text, size=self.size, style=self.style
+                )
+            return self._rect
+
+        # how far down a rendered line its baseline is
+        @property
+        def baseline(self) -> int:
+            return self.size + self.font.Font.get_sized_descender(self.size)
+
+        # see Font.get_extent()
+        @property
+        def extent(self):
+            if self._extent is not False:
+                return self._extent
+
+            self._extent = None
+            if self.style == pygame.freetype.STYLE_DEFAULT or not (
+                self.style & font.Font.NON_ADDITIVE_STYLES
+            ):
+                advances = self.advances
+                if None not in advances:
+                    rect = self.rect
+                    if rect.w:
+                        self._extent = (sum(advances), rect.x, rect.x + rect.w)
+                    else:
+                        self._extent = (sum(advances), None, None)
+
+            return self._extent
+
     class Font:
+        # styles render() can put together out of glyphs, see the note at the top
+        ATLAS_STYLES = {
+            pygame.freetype.STYLE_DEFAULT,
+            pygame.freetype.STYLE_NORMAL,
+            pygame.freetype.STYLE_OBLIQUE,
+        }
+        LINE_CACHE_SIZE = 256  # lines of rendered text kept per font
+        ATLAS_CACHE_SIZE = 8  # sizes and styles, resizing goes through a lot of sizes
+        RUN_CACHE_SIZE = 4096  # words and lines shaped by shape()
+
+        # emboldening gives fractional advances that don't add up to the line's width
+        NON_ADDITIVE_STYLES = pygame.freetype.STYLE_STRONG | pygame.freetype.STYLE_WIDE
+
         def __init__(self, filepath):
             self.path = path.handle(filepath)
             self.Font = pygame.freetype.Font(self.path)
@@ -64,11 +214,34 @@ class font:
             # directly on the font, rather than passing them in like render()
             self.dummy_font = pygame.freetype.Font(self.path)
 
+            self._atlases = OrderedDict()  # (size, style) : font._GlyphAtlas
+            self._lines = OrderedDict()  # render() arguments : image, oldest first
+            self._runs = OrderedDict()  # shape() arguments : font._ShapedRun
+
         # returns a tuple (image, rect)
+        # images are shared with the line cache, so they shouldn't be drawn on
         def render(self, textstr, size, bgcolor, color, style):
-            calc_size = self.Font.get_rect(textstr, size=size, style=style)
+            key = (textstr, size, tuple(bgcolor), tuple(color), style)
+            try:
+                self._lines.move_to_end(key)
+                surf = self._lines[key]
+            except KeyError:
+                surf = self._compose(textstr, size, bgcolor, color, style)
+                if surf is None:
+                    surf = self._render(textstr, size, bgcolor, color, style)
+
+                self._lines[key] = surf
+                if len(self._lines) > self.LINE_CACHE_SIZE:
+                    self._lines.popitem(last=False)
+
+            return surf, surf.get_rect()
 
-            y = size - calc_size.y + self.Font.get_sized_descender(size)
+        # renders a line with freetype
+        def _render(self, textstr, size, bgcolor, color, style):
+            run = self.shape(textstr, size, style)
+            calc_size = run.rect
+
+            y = run.baseline - calc_size.y
 
             ydiff = 0
             if y < 0:
@@ -93,12 +266,71 @@ class font:
                 style=style,
             )
 
-            return surf, surf.get_rect()
+            return surf
+
+        # puts a line together out of the glyph atlas, laid out the same as _render
+        # returns None if it can't be done the same way, see the note at the top
+        def _compose(self, textstr, size, bgcolor, color, style):
+            if (
+                style not in font.Font.ATLAS_STYLES
+                or len(bgcolor) < 4
+                or bgcolor[3] != 0
+                or (len(color) > 3 and color[3] != 255)
+            ):
+                return None
+
+            atlas_key = (size, style)
+            try:
+                self._atlases.move_to_end(atlas_key)
+                atlas = self._atlases[atlas_key]
+            except KeyError:
+                atlas = font._GlyphAtlas(self.Font, size, style)
+                self._atlases[atlas_key] = atlas
+                if len(self._atlases) > self.ATLAS_CACHE_SIZE:
+                    self._atlases.popitem(last=False)
+
+            # where every glyph goes, and the bounding box get_rect() would give
+            blits = []
+            pen = 0
+            left = right = top = None
+            for char in textstr:
+                glyph = atlas.get(char)
+                if glyph is None:
+                    return None
+
+                area, bearing_x, bearing_y, advance = glyph
+                if area.w:
+                    x = round(pen) + bearing_x
+                    left = x if left is None else min(left, x)
+                    right = x + area.w if right is None else max(right, x + area.w)
+                    top = bearing_y if top is None else max(top, bearing_y)
+                    blits.append((area, x, bearing_y))
+                pen += advance
+
+            if left is None:  # nothing visible, like only spaces
+                return None
+
+            y = size - top + atlas.descender
 
-        def get_metrics(self, textstr, size, style):
-            self.dummy_font.style = style
+            ydiff = 0
+            if y < 0:
+                ydiff = -y
+                y = 0
+
+            surf = pygame.Surface((right - left, size + ydiff), pygame.SRCALPHA)
+            surf.blits(
+                [
+                    (atlas.surface, (x - left, y + top - bearing_y), area)
+                    for area, x, bearing_y in blits
+                ],
+                False,
+            )
+            surf.fill(color, special_flags=pygame.BLEND_RGBA_MULT)
+
+            return surf
 
-            m = self.dummy_font.get_metrics(textstr, size)
+        def get_metrics(self, textstr, size, style):
+            m = list(self.shape(textstr, size, style).metrics)
 
             # patch trailing whitespace not being appreciated
             if textstr and textstr[-1] == " ":
@@ -115,7 +347,7 @@ class font:
                         for i, metric in enumerate(m)
                     ]
                 )
-                m = self.dummy_font.get_metrics(textstr, size)
+                m = list(self.shape(textstr, size, style).metrics)
 
             if m:
                 prev_x = -m[0][0]
@@ -134,7 +366,45 @@ class font:
             return m
 
         def find_px_length(self, textstr, size, style):
-            return self.Font.get_rect(textstr, size=size, style=style).w
+            return self.shape(textstr, size, style).rect.w
+
+        # the shaping of text at a size and style, kept in an LRU cache so that
+        # wrapping, rendering and the metrics of the same text measure it only once
+        def shape(self, textstr, size, style) -> "font._ShapedRun":
+            key = (textstr, size, style)
+            try:
+                self._runs.move_to_end(key)
+                return self._runs[key]
+            except KeyError:
+                run = font._ShapedRun(self, textstr, size, style)
+                self._runs[key] = run
+                if len(self._runs) > self.RUN_CACHE_SIZE:
+                    self._runs.popitem(last=False)
+                return run
+
+        # (advance, left, right) of a piece of text, left and right being where its ink
+        # starts and ends, or None if it has none. Extents of consecutive pieces join
+        # up with join_extents(), so lines can be measured a word at a time.
+        # returns None if the style doesn't add up like that (see NON_ADDITIVE_STYLES)
+        def get_extent(self, textstr, size, style):
+            return self.shape(textstr, size, style).extent
+
+        # the extent of text a followed by text b
+        @staticmethod
+        def join_extents(a, b):
+            advance = a[0] + b[0]
+
+            if b[1] is None:
+                return advance, a[1], a[2]
+            if a[1] is None:
+                return advance, a[0] + b[1], a[0] + b[2]
+
+            return advance, min(a[1], a[0] + b[1]), max(a[2], a[0] + b[2])
+
+        # the same as find_px_length() gives for the text of the extent
+        @staticmethod
+        def get_extent_length(extent):
+            return 0 if extent[1] is None else extent[2] - extent[1]
 
         # for some reason freetype font instances can't be automatically copied with copy.deepcopy()
         # this is my mitigation
@@ -152,6 +422,9 @@ class font:
 
     # class that allows you to create pixelart fonts from images relatively easy
     class CustomFont(Font):
+        SIZE_CACHE_SIZE = 8  # sizes of the glyph set kept resized
+        COLOR_CACHE_SIZE = 16  # (size, color)s of the glyph set kept recolored
+
         # char_images = {"char": pygame.Surface, "char": (pygame.Surface, custom width)}
         # current_size = the current height of the font in pixels.
         # gap = the gap between characters in pixels, at the current_size
@@ -161,6 +434,9 @@ class font:
             self.image_color = current_color
             self.gap = gap
 
+            self._sizes = OrderedDict()  # size : (resized char images, gap)
+            self._colors = OrderedDict()  # (size, color) : {char : recolored image}
+
         # the meat of the __init__, automatically called on demand b/c pgx.init comes before
         # video init so can't do surface operations.
         def _setup(self):
@@ -187,7 +463,7 @@ class font:
                 except:
                     self.char_images[char] = (im.convert_alpha(), im.get_width())
 
-            self.cached = (self.image_size, self.char_images.copy(), self.gap)
+            self._sizes[self.image_size] = (self.char_images.copy(), self.gap)
 
         # returns a tuple (image, rect)
         def render(self, textstr, size, bgcolor, color, style):
@@ -196,29 +472,34 @@ class font:
             surf = pygame.Surface((width if width != 0 else 1, size), pygame.SRCALPHA)
             surf.fill(bgcolor)
 
-            _, font_chars, gap = self.cached
+            font_chars, gap = self._get_chars(size)
+            char_ims = self._get_colored_chars(size, color)
             text = self._process_text(textstr)
 
+            blits = []
             x = 0
             for char in text:
-                # turning the scaled character image to the right color
-                char_im = pygame.PixelArray(font_chars[char][0].copy())
-                char_im.replace(self.image_color, color)
-                char_im = char_im.make_surface()
-
-                surf.blit(char_im, (x, 0))
+                try:
+                    char_im = char_ims[char]
+                except KeyError:
+                    # turning the scaled character image to the right color
+                    char_im = pygame.PixelArray(font_chars[char][0].copy())
+                    char_im.replace(self.image_color, color)
+                    char_im = char_im.make_surface()
+                    char_ims[char] = char_im
+
+                blits.append((char_im, (x, 0)))
                 x += font_chars[char][1] + gap
 
+            surf.blits(blits, False)
+
             return surf, surf.get_rect()
 
         def get_metrics(self, textstr, size, style):
             # (min_x, max_x, min_y, max_y, horizontal_advance_x, horizontal_advance_y)
             # only imitates what is used later on (for now)
 
-            if self.cached[0] != size:
-                self._resize_images(size)
-
-            _, font_chars, gap = self.cached
+            font_chars, gap = self._get_chars(size)
             text = self._process_text(textstr)
 
             metrics = []
@@ -235,16 +516,10 @@ class font:
 
         # part of the common font standard
         def find_px_length(self, textstr, size, style):
-            if not getattr(self, "cached", False):
-                self._setup()
-
             if textstr == "":
                 return 0
 
-            if self.cached[0] != size:
-                self._resize_images(size)
-
-            _, font_chars, gap = self.cached
+            font_chars, gap = self._get_chars(size)
             text = self._process_text(textstr)
 
             length = font_chars[text.pop(0)][1]
@@ -253,7 +528,44 @@ class font:
 
             return length
 
-        # scales all of the character images and puts them in a place to be accessed
+        # every character is followed by the gap, the ink starts at 0 and ends before
+        # the last gap
+        def get_extent(self, textstr, size, style):
+            if textstr == "":
+                return 0, None, None
+
+            length = self.find_px_length(textstr, size, style)
+            return length + self._get_chars(size)[1], 0, length
+
+        # the character images and gap at size, resized if they aren't kept already
+        def _get_chars(self, size):
+            if not self._sizes:
+                self._setup()
+
+            try:
+                self._sizes.move_to_end(size)
+                return self._sizes[size]
+            except KeyError:
+                chars = self._resize_images(size)
+                self._sizes[size] = chars
+                if len(self._sizes) > self.SIZE_CACHE_SIZE:
+                    self._sizes.popitem(last=False)
+                return chars
+
+        # the recolored character images at size and color, filled in by render()
+        def _get_colored_chars(self, size, color):
+            key = (size, tuple(pygame.Color(color)))
+            try:
+                self._colors.move_to_end(key)
+                return self._colors[key]
+            except KeyError:
+                char_ims = {}
+                self._colors[key] = char_ims
+                if len(self._colors) > self.COLOR_CACHE_SIZE:
+                    self._colors.popitem(last=False)
+                return char_ims
+
+        # scales all of the character images, returns them with the gap at that size
         def _resize_images(self, size):
             scalar = size / self.image_size
 
@@ -263,7 +575,7 @@ class font:
                 width = self.char_images[char][1] * scalar
                 scaled_images[char] = (im, width)
 
-            self.cached = (size, scaled_images, self.gap * scalar)
+            return scaled_images, self.gap * scalar
 
         # takes a string, returns char list. any characters not in font are told to use "missing"
         def _process_text(self, textstr):
@@ -1,5 +1,24 @@
 from pgx.scale import scale
 
+"""
+Coordinates can be numbers or strings of keywords and numbers, like "width+20".
+interpret_coords evaluates them as they are. compile_coord parses them once into
+a linear form: a number, plus keyword x coefficient terms, plus a constant.
+resolve_coords then turns that into pixels with nothing but arithmetic.
+"""
+
+# keyword : (panel dimension index, multiplier, divisor)
+# a keyword is worth panel[index] * multiplier / divisor, the same operations eval did
+KEYWORDS = {
+    "left": None,
+    "top": None,
+    "right": (2, 1, 1),
+    "width": (2, 1, 1),
+    "center": (2, 1, 2),
+    "bottom": (3, 1, 1),
+    "height": (3, 1, 1),
+}
+
 
 def interpret_coords(rect, align, panel_rect=False, ignore_offset=False):
     # if explicit area not passed in, use the screen dimensions as that area
@@ -44,3 +63,111 @@ def interpret_coords(rect, align, panel_rect=False, ignore_offset=False):
     if not ignore_offset:
         rect[0] += scale.get_offset()[0]
         rect[1] += scale.get_offset()[1]
+
+
+# one additive term, a product of numbers and at most one keyword
+# returns a keyword term (index, multiplier, divisor), or a constant
+def _compile_product(term, coord):
+    product = term.replace("/", "*/").split("*")
+    multiplier = 1
+    divisor = 1
+    keyword = False
+
+    for factor in product:
+        divide = factor.startswith("/")
+        factor = factor.lstrip("/").strip()
+        sign = -1 if factor.startswith("-") else 1
+        factor = factor.lstrip("+-").strip()
+
+        if factor in KEYWORDS:
+            if keyword is not False or divide:
+                raise ValueError(f"coordinate '{coord}' isn't linear in its keywords")
+            keyword = KEYWORDS[factor]
+            multiplier *= sign
+            continue
+
+        try:
+            number = float(factor) * sign
+        except ValueError:
+            raise ValueError(f"can't understand '{factor}' in coordinate '{coord}'")
+
+        if divide:
+            divisor *= number
+        else:
+            multiplier *= number
+
+    if keyword is False:
+        return multiplier / divisor
+    if keyword is None:  # left and top are always 0
+        return 0
+
+    index, keyword_multiplier, keyword_divisor = keyword
+    return index, multiplier * keyword_multiplier, divisor * keyword_divisor
+
+
+# coordinate (str, int or float) -> (number, (keyword terms, constant))
+# the number is what scales with the ui, the same split as Location always made:
+# integer terms get summed into the number, everything else is relative to the panel
+def compile_coord(coord):
+    try:
+        return int(coord), ((), 0)
+    except (TypeError, ValueError):
+        pass
+
+    if type(coord) != str:
+        raise TypeError("coordinates can be in strings, ints, or floats only")
+
+    number = 0
+    keyword_terms = []
+    constant = 0
+
+    # splits before every + or -, keeping the sign with its term
+    terms = "".join(char if char not in "+-" else " " + char for char in coord)
+
+    for term in terms.split(" "):
+        if not term.strip():
+            continue
+
+        try:
+            number += int(term)
+            continue
+        except ValueError:
+            pass
+
+        compiled = _compile_product(term, coord)
+        if type(compiled) == tuple:
+            keyword_terms.append(compiled)
+        else:
+            constant += compiled
+
+    return number, (tuple(keyword_terms), constant)
+
+
+# the compiled version of interpret_coords
+# rect_num is the numbers of the coordinates, terms the rest of their compiled forms
+def resolve_coords(rect_num, terms, align, panel_rect, ignore_offset=False):
+    rect = list(rect_num)
+    for i, (keyword_terms, constant) in enumerate(terms):
+        for index, multiplier, divisor in keyword_terms:
+            rect[i] += panel_rect[index] * multiplier / divisor
+        if constant:
+            rect[i] += constant
+
+    rect[0] += panel_rect[0]
+    rect[1] += panel_rect[1]
+
+    # further alignment
+    if align == "right":
+        rect[0] -= rect[2]
+    elif align == "center":
+        rect[0] -= rect[2] / 2
+    elif align != "left":
+        raise ValueError("align can be: 'left', 'right', or 'center' only")
+
+    # global offsets
+    if not ignore_offset:
+        offset = scale.get_offset()
+        rect[0] += offset[0]
+        rect[1] += offset[1]
+
+    return rect
@@ -1,3 +1,6 @@
+from collections import deque
+
+import pygame.event
 import pygame.time
 
 """
@@ -11,6 +14,18 @@ Loopers - goes through a variety of states with a delay Ex: [0, 1, 2, 3, 0, 1, 2
 Stopwatches - keep track of time after it starts
 """
 
+"""
+Adaptive frame scheduling (time.set_adaptive):
+
+A program showing something static doesn't need to redraw it at full speed.
+After `linger` seconds without input, requested frames or wake ups, ticks stop
+limiting to the given fps and instead block on pygame.event.wait, waking up for
+the next event, the next frame something asked for with time.request_frame
+(an animation, like a blinking cursor), a time.wake() from another thread
+(a background result arriving), or at idle_fps at the latest.
+Any of those switches straight back to the full rate.
+"""
+
 
 class time:
     clock = pygame.time.Clock()
@@ -20,9 +35,28 @@ class time:
     _last_ticks = 0
     loops = 0
 
+    # adaptive scheduling
+    adaptive = False
+    idle_fps = 2
+    linger = 0.5  # seconds at full rate after the last activity
+    WAKE = pygame.event.custom_type()  # event type time.wake() posts
+
+    _last_activity = 0  # msec
+    _frame_due = None  # msec a frame was requested by, None if none was
+    _waited_events = []  # events that ended an idle wait, handed to pgx.events
+
+    # frame time stats
+    frame_times = deque(maxlen=300)  # msec, of the latest frames
+    idle_frames = 0
+
     @staticmethod
     def _tick(*args):
-        time.clock.tick(*args)
+        if time.adaptive and time._is_idle():
+            time._wait_idle()
+            time.clock.tick()
+            time.idle_frames += 1
+        else:
+            time.clock.tick(*args)
 
         delta_ticks = pygame.time.get_ticks() - time._last_ticks
         time._last_ticks = pygame.time.get_ticks()
@@ -31,9 +65,82 @@ class time:
         if time.delta_time_cap is not None:
             time.delta_time = min(time.delta_time, time.delta_time_cap)
 
+        # the requested frame is this one
+        if time._frame_due is not None and time._frame_due <= time._last_ticks:
+            time._frame_due = None
+
+        time.frame_times.append(delta_ticks)
         time.loops += 1
 
+    @staticmethod
+    def _is_idle():
+        now = pygame.time.get_ticks()
+
+        if now - time._last_activity < time.linger * 1000:
+            return False
+
+        return time._frame_due is None or time._frame_due > now
+
+    @staticmethod
+    def _wait_idle():
+        timeout = 1000 / time.idle_fps
+        if time._frame_due is not None:
+            timeout = min(timeout, time._frame_due - pygame.time.get_ticks())
+
+        event = pygame.event.wait(max(int(timeout), 1))
+        if event.type != pygame.NOEVENT:
+            time._waited_events.append(event)
+
+    @staticmethod
+    def _take_waited_events() -> list:
+        waited = time._waited_events
+        time._waited_events = []
+        return waited
+
     @staticmethod
     def get_loops() -> int:
         """The number of times the program has gone through the game loop."""
         return time.loops
+
+    @staticmethod
+    def set_adaptive(adaptive: bool) -> None:
+        """Let ticks slow down to idle_fps while nothing is happening."""
+        time.adaptive = adaptive
+        time.mark_active()
+
+    @staticmethod
+    def mark_active() -> None:
+        """Run at the full rate for at least another `linger` seconds."""
+        time._last_activity = pygame.time.get_ticks()
+
+    @staticmethod
+    def request_frame(delay: float = 0) -> None:
+        """Make sure a frame happens within delay seconds, for animations."""
+        due = pygame.time.get_ticks() + int(delay * 1000)
+        if time._frame_due is None or due < time._frame_due:
+            time._frame_due = due
+
+    @staticmethod
+    def wake() -> None:
+        """Wake up an idle tick, safe to call from any thread."""
+        try:
+            pygame.event.post(pygame.event.Event(time.WAKE))
+        except pygame.error:
+            pass  # the display is gone, nothing to wake
+
+    @staticmethod
+    def get_stats() -> dict:
+        """Frame time stats over the latest frames, in msec."""
+        frame_times = sorted(time.frame_times)
+        if not frame_times:
+            return {"frames": time.loops, "idle_frames": time.idle_frames}
+
+        mean = sum(frame_times) / len(frame_times)
+        return {
+            "frames": time.loops,
+            "idle_frames": time.idle_frames,
+            "mean": mean,
+            "p95": frame_times[int(len(frame_times) * 0.95) - 1],
+            "max": frame_times[-1],
+            "fps": 1000 / mean if mean else None,
+        }
@@ -6,13 +6,15 @@ import pygame
 
 from pgx.scale import scale
 from pgx.time import time
+from pgx.ui.dirty import dirty
+from pgx.ui.layout import layout
 
 #                          #
 # WHAT AN UI ELEMENT NEEDS #
 #                          #
 
 # _display(self, screen) method -> None
-# implements what the element does when displayed
+# implements what the element does when displayed, other than drawing
 
 # call into UI init - super().__init__(location, components)
 
@@ -26,6 +28,17 @@ from pgx.time import time
 # _scale(self) -> None
 # if the element has needs to scale itself somehow, implement that here
 
+# _draw(self, screen) method -> None
+# draws the element, it may be called again later without _display to redraw it (see dirty.py)
+
+# _get_state(self) -> anything comparable
+# whatever changes how the element looks apart from its location, like its image
+
+# _get_draw_rect(self) -> pygame.Rect
+# the area the element draws in, if that's more than its location
+
+# _draw and _get_draw_rect find where the element is with _get_rect(), not location.resolve()
+
 
 class UI(ABC):
     def __init__(self, location, *args):
@@ -43,6 +56,9 @@ class UI(ABC):
         self.system_scaling_enabled = True
 
         self._last_loop = -1
+        self._last_drawn = None  # (state, draw rect) it was last drawn with, see dirty.py
+        self._layout_solution = None  # its tree laid out, when displayed as a root
+        self._laid_out_rect = None  # where the layout put it on its last display
 
         # if unspecified width and height dimensions (represented as -1), tries to find a better solution
         self.size_sources = ["unset", "unset"]
@@ -139,13 +155,63 @@ class UI(ABC):
             )
         self._last_loop = time.get_loops()
 
-        # scaling system
+        # a root lays out its whole tree up front, see layout.py
+        if layout.enabled and panel_dim is None:
+            outer = layout._current  # roots can be displayed inside other elements
+            layout._current = layout._update(self)
+            try:
+                self._display_laid_out(screen, panel_dim)
+            finally:
+                layout._current = outer
+        else:
+            self._display_laid_out(screen, panel_dim)
+
+    def _display_laid_out(self, screen, panel_dim):
+        solution = layout._current
+        slot = layout._slot(self, self._get_scalar())
+
+        if slot is None:
+            self._apply_layout(panel_dim)
+            self._laid_out_rect = None
+        else:
+            self._laid_out_rect = solution.rects[slot]
+
+        if self.visible:
+            self._display(screen)
+
+            # with dirty rendering on, drawing waits until it's known what changed
+            if dirty.enabled and screen is pygame.display.get_surface():
+                dirty._record(self, self._get_state(), self._get_draw_rect())
+            else:
+                self._draw(screen)
+
+            for component in self.components:
+                # custom scaling needs to filter down into sub-elements
+                component.parent_user_scale = self.user_scale
+
+                # we're testing this out
+                component.parent = self
+
+                # base_rect represents a newly resolved panel dimension
+                # everything on this layer of abstraction is using unscaled numbers
+                if slot is None:
+                    base_rect = self.location.get_resolved_base_rect()
+                else:
+                    base_rect = solution.base_rects[slot]
+                component.display(screen, base_rect)
+
+    def _get_scalar(self):
         if self.system_scaling_enabled:
             self.ui_scale = scale.get_scalar()
         else:
             self.ui_scale = 1
 
-        scalar = self.ui_scale * self.user_scale * self.parent_user_scale
+        return self.ui_scale * self.user_scale * self.parent_user_scale
+
+    # everything display does before the element can be drawn, as layout.py does it too
+    def _apply_layout(self, panel_dim):
+        # scaling system
+        scalar = self._get_scalar()
 
         if self.scale != scalar:
             self.scale = scalar
@@ -165,25 +231,25 @@ class UI(ABC):
         if self.visible:
             self.location.resolve()  # drives the location to stay up to date with changes
 
-            self._display(screen)
-
-            for component in self.components:
-                # custom scaling needs to filter down into sub-elements
-                component.parent_user_scale = self.user_scale
-
-                # we're testing this out
-                component.parent = self
-
-                # base_rect represents a newly resolved panel dimension
-                # everything on this layer of abstraction is using unscaled numbers
-                component.display(screen, self.location.get_resolved_base_rect())
-
     def copy(self):
         return copy.deepcopy(self)
 
     def _get_content_size(self):
         return [-1, -1]
 
+    def _get_state(self):
+        return None
+
+    def _get_draw_rect(self):
+        return self._get_rect().copy()
+
+    # the resolved rect of the element, as laid out by the layout pass if it was
+    # the rect is shared, so it shouldn't be changed
+    def _get_rect(self):
+        if self._laid_out_rect is not None:
+            return self._laid_out_rect
+        return self.location.resolve()
+
     def add_component(self, *args):
         self.add_components(*args)
 
@@ -194,11 +260,14 @@ class UI(ABC):
             self.components.append(component)
             component.parent = self
 
+        layout.invalidate()
+
     def get_components(self):
         return self.components
 
     def clear_components(self):
         self.components = []
+        layout.invalidate()
 
     # should be overwritten by subclass
     def _scale(self):
@@ -209,6 +278,10 @@ class UI(ABC):
     def _display(self, _):
         raise NotImplementedError("UI subclasses require an _display() method")
 
+    # should be overwritten by subclasses that draw anything
+    def _draw(self, _):
+        pass
+
     """future:"""
     """Calling _scale or _display on a UI object that has not defined those with result in an exception being raised"""
 
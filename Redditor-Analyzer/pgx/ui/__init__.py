@@ -1,4 +1,6 @@
 from pgx.ui.UI import UI
+from pgx.ui.dirty import dirty
+from pgx.ui.layout import layout
 
 from pgx.ui.base import *
 from pgx.ui.compound import *
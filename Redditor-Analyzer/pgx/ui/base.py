@@ -41,12 +41,32 @@ class Box(UI):
         )
         self.border_radius = self.orig_border_radius
 
-    def _display(self, screen):
-        rect = self.location.resolve()
+    def _display(self, _):
+        pass
+
+    def _draw(self, screen):
+        rect = self._get_rect()
+
+        # outlines are drawn edge by edge, pygame fills the whole clip area
+        # when it is narrower than the outline, which breaks dirty redraws
+        width = self.width
+        if width and not self.border_radius and width * 2 < min(rect.w, rect.h):
+            for edge in (
+                (rect.x, rect.y, rect.w, width),
+                (rect.x, rect.bottom - width, rect.w, width),
+                (rect.x, rect.y, width, rect.h),
+                (rect.right - width, rect.y, width, rect.h),
+            ):
+                pygame.draw.rect(screen, self.color, edge)
+            return
+
         pygame.draw.rect(
             screen, self.color, rect, self.width, border_radius=self.border_radius
         )
 
+    def _get_state(self):
+        return (tuple(self.color), self.width, self.border_radius)
+
     def _scale(self):
         # adjusts original width by the scale
         width = int(self.orig_width * self.scale)
@@ -63,38 +83,61 @@ class Box(UI):
 
 
 class ImageBox(UI):
-    def __init__(self, location, image):
+    # kwargs
+    # scaler < function or None, (default None) called with the element's scale, returns the image to draw
+    # lets the caller supply prescaled images, which ImageBox then uses without copying or rescaling
+    def __init__(self, location, image, **kwargs):
         if type(image) != pygame.Surface:
             raise TypeError("Imagebox.image must be a pygame.Surface")
         self.__dict__["orig_image"] = image.copy()
         self.__dict__["image"] = image
+        self.__dict__["scaler"] = None if "scaler" not in kwargs else kwargs["scaler"]
 
         super().__init__(location)
 
-    def _display(self, screen):
-        rect = self.location.resolve()
+    def _display(self, _):
+        pass
+
+    def _draw(self, screen):
+        rect = self._get_rect()
         screen.blit(self.image, (rect.x, rect.y))
 
+    def _get_state(self):
+        return self.image
+
+    def _get_draw_rect(self):
+        rect = self._get_rect()
+        return rect.union(self.image.get_rect(topleft=rect.topleft))
+
     def _get_content_size(self):  # should this return image or orig_image size??
         return self.image.get_size()
 
     def _scale(self):
-        self.__dict__["image"] = image.scale(self.orig_image, self.scale)
+        if self.scaler:
+            self.__dict__["image"] = self.scaler(self.scale)
+        else:
+            self.__dict__["image"] = image.scale(self.orig_image, self.scale)
 
     def __setattr__(self, name, value):
         if name == "image":
             if type(value) != pygame.Surface:
                 raise TypeError("Imagebox.image must be a pygame.Surface")
+            self.__dict__["scaler"] = None
             self.__dict__["orig_image"] = value.copy()
             self.__dict__["image"] = value
             self._scale()
 
+        elif name == "scaler":
+            self.__dict__["scaler"] = value
+            self._scale()
+
         else:
             self.__dict__[name] = value
 
     # public attributes
     # everything in general UI
     # .image > pygame.Surface
+    # .scaler > function or None, setting .image clears it
 
 
 class TextBox(UI):
@@ -104,13 +147,22 @@ class TextBox(UI):
 
         super().__init__(location, *args)
 
-    def _display(self, screen):
+    def _display(self, _):
         if self.size_sources[0] == "location":
             self.text.limit = self.location.resolve().w
 
-        rect = self.location.resolve()
+    def _draw(self, screen):
+        rect = self._get_rect()
         screen.blit(self.text.get_image(), (rect.x, rect.y))
 
+    # the image is regenerated whenever the text changes in any way
+    def _get_state(self):
+        return self.text.get_image()
+
+    def _get_draw_rect(self):
+        rect = self._get_rect()
+        return rect.union(self.text.get_image().get_rect(topleft=rect.topleft))
+
     def __getattr__(self, name):
         # why color and not other text attributes?
         # color b/c consistency with other elements, like box
@@ -221,13 +273,18 @@ class Drawing(UI):
         self.shape.set_topleft(self.location.resolve()[0:2])
         self.offset = self.shape.get_topleft()
 
-    def _display(self, screen):
+    def _display(self, _):
         if self.offset != self.location.resolve()[0:2]:
             self.shape.set_topleft(self.location.resolve()[0:2])
             self.offset = self.shape.get_topleft()
 
+    def _draw(self, screen):
         self.shape.display(screen)
 
+    def _get_draw_rect(self):
+        rect = self._get_rect()
+        return pygame.Rect(rect.topleft, self.shape.get_size())
+
     def _get_content_size(self):
         return self.shape.get_size()
 
@@ -100,9 +100,17 @@ class Selectable(UI):
                 if p1 != p2:
                     self.indices_state = self._calculate_bounds(p1, p2)
 
+    def _draw(self, screen):
         if self.indices_state:
             self._draw_bounds(screen, self.get_bounds())
 
+    def _get_state(self):
+        return self.get_bounds() and tuple(self.get_bounds())
+
+    # it draws over its parent's text
+    def _get_draw_rect(self):
+        return self.parent._get_rect().copy()
+
     def get_bounds(self):
         if not self.indices_state:
             return False
@@ -241,6 +249,6 @@ class Selectable(UI):
             obsrect = pygame.Rect(
                 (*start.topleft, stop.right - start.left, start.height)
             )
-            obsrect.move_ip(self.parent.location.resolve().topleft)
+            obsrect.move_ip(self.parent._get_rect().topleft)
 
             image.obscure(screen, self.select_color, area=obsrect)
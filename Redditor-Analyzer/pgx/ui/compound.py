@@ -86,9 +86,16 @@ class InputBox(UI):
 
         self.textbox.display(screen)
 
-        # cursor display goes over (after) textbox display
         if self.clicked:
-            self._update_text_cursor(screen)
+            self._update_text_cursor()
+
+    # cursor display goes over (after) textbox display
+    def _draw(self, screen):
+        if self.clicked and self.cursor_visible:
+            self._draw_text_cursor(screen)
+
+    def _get_state(self):
+        return (self.clicked and self.cursor_visible, self.cursor_index)
 
     def _update_clicked(self):
         clickrect = self.location.resolve()
@@ -129,34 +136,42 @@ class InputBox(UI):
         self.cursor_timer = 0
         self.cursor_visible = True
 
-    def _update_text_cursor(self, screen):
+    def _update_text_cursor(self):
         self.cursor_timer += time.delta_time
         if self.cursor_timer > self.cursor_blinktime:
             self.cursor_timer = 0
             self.cursor_visible = not self.cursor_visible
 
-        if self.cursor_visible:
-            m = self.text.get_rect_metrics()
+        # keeps blinking when ticks are idle
+        time.request_frame(self.cursor_blinktime - self.cursor_timer)
 
-            if m:
-                if self.cursor_index == 0:
-                    x, y = m[self.cursor_index][0:2]
+    def _draw_text_cursor(self, screen):
+        m = self.text.get_rect_metrics()
 
-                else:
-                    r = m[self.cursor_index - 1]
-                    x = r.right
-                    y = r.y
+        if m:
+            if self.cursor_index == 0:
+                x, y = m[self.cursor_index][0:2]
 
-                xoff, yoff = self.location.resolve()[0:2]
+            else:
+                r = m[self.cursor_index - 1]
+                x = r.right
+                y = r.y
+
+            xoff, yoff = self._get_rect()[0:2]
 
-                x += xoff
-                y += yoff
+            x += xoff
+            y += yoff
 
-                height = self.text.size
-                width = int(height / 25) or 1
-                color = self.text.color
+            height = self.text.size
+            width = int(height / 25) or 1
+            color = self.text.color
 
-                pygame.draw.rect(screen, color, [x, y, width, height])
+            pygame.draw.rect(screen, color, [x, y, width, height])
+
+    def _get_draw_rect(self):
+        # the cursor can sit just past the end of the text
+        rect = self._get_rect()
+        return rect.inflate(int(self.text.size / 25) * 2 + 2, 0)
 
     # bounded addition / subtraction for text cursor
     def _move_text_cursor(self, movement):
@@ -384,6 +399,10 @@ class InputGetter(TextBox):
                 self.blink_timer = self.blink_time
                 self.blink_on = not self.blink_on
 
+            # keeps blinking when ticks are idle
+            if self.clicked:
+                time.request_frame(self.blink_timer)
+
             if self.blink_on and self.clicked:
                 loc = self.location.get_resolved_base_rect()
                 self.blink_box.location.x = loc.right + 2
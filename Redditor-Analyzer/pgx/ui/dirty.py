@@ -0,0 +1,128 @@
+from typing import List
+
+import pygame
+
+"""
+Dirty rectangle rendering for the UI tree.
+
+When enabled, displaying an element runs its logic right away but only records how
+it would be drawn: its state (_get_state) and the area it covers (_get_draw_rect).
+dirty.render() then compares every recorded element against the last frame, and
+redraws only the areas that changed - the background and every element in them,
+in their original order. The areas are returned to pass to pygame.display.update().
+
+Elements that stop being displayed leave their old area dirty, so they get cleared.
+Anything drawn outside the UI tree isn't tracked, call dirty.mark_all() after it.
+"""
+
+
+class dirty:
+    enabled = False
+
+    # what got displayed this frame, as [(element, state, draw rect)]
+    _frame = []
+    # elements drawn last frame, id : element
+    _drawn = {}
+    _full = True
+
+    # past this share of the screen it's quicker to redraw everything at once
+    FULL_REDRAW_SHARE = 0.5
+
+    @staticmethod
+    def enable() -> None:
+        """Defer drawing of UI elements to dirty.render() every frame."""
+        dirty.enabled = True
+        dirty.mark_all()
+
+    @staticmethod
+    def disable() -> None:
+        """Go back to UI elements drawing themselves when displayed."""
+        dirty.enabled = False
+        dirty._frame = []
+        dirty._drawn = {}
+
+    @staticmethod
+    def mark_all() -> None:
+        """Redraw the whole screen on the next render, like after a resize."""
+        dirty._full = True
+
+    @staticmethod
+    def _record(element, state, rect) -> None:
+        dirty._frame.append((element, state, rect))
+
+    @staticmethod
+    def _find_rects(screen_rect) -> List[pygame.Rect]:
+        if dirty._full:
+            return [screen_rect]
+
+        rects = []
+        displayed = set()
+
+        for element, state, rect in dirty._frame:
+            displayed.add(id(element))
+            last = element._last_drawn
+
+            if last is None:
+                rects.append(rect)
+            elif last != (state, rect):
+                rects.append(last[1])
+                rects.append(rect)
+
+        for key, element in dirty._drawn.items():
+            if key not in displayed and element._last_drawn is not None:
+                rects.append(element._last_drawn[1])
+
+        return dirty._merge(rects, screen_rect)
+
+    # joins overlapping rects, so nothing gets drawn twice
+    @staticmethod
+    def _merge(rects, screen_rect) -> List[pygame.Rect]:
+        merged = []
+
+        for rect in rects:
+            rect = rect.clip(screen_rect)
+            if not rect.w or not rect.h:
+                continue
+
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+
+        area = sum(rect.w * rect.h for rect in merged)
+        if area > screen_rect.w * screen_rect.h * dirty.FULL_REDRAW_SHARE:
+            return [screen_rect]
+
+        return merged
+
+    @staticmethod
+    def render(background) -> List[pygame.Rect]:
+        """Redraw what changed since the last frame over the background color.
+        Returns the areas redrawn, for pygame.display.update()."""
+        screen = pygame.display.get_surface()
+        screen_rect = screen.get_rect()
+        rects = dirty._find_rects(screen_rect)
+
+        for rect in rects:
+            screen.set_clip(rect)
+            screen.fill(background)
+
+            for element, _, element_rect in dirty._frame:
+                if rect == screen_rect or element_rect.colliderect(rect):
+                    element._draw(screen)
+
+        screen.set_clip(None)
+
+        # becomes what the next frame is compared against
+        for element in dirty._drawn.values():
+            element._last_drawn = None
+        dirty._drawn = {}
+        for element, state, rect in dirty._frame:
+            element._last_drawn = (state, rect)
+            dirty._drawn[id(element)] = element
+
+        dirty._frame = []
+        dirty._full = False
+
+        return rects
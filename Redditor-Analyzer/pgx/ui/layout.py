@@ -0,0 +1,138 @@
+from pgx.Location import Location
+from pgx.scale import scale
+
+"""
+Layout pass for the UI tree.
+
+When enabled, displaying a root element (one displayed without a panel_dim) first
+makes sure its tree is laid out: scale, sizes, parent contexts and locations for every
+element, solved top-down in one walk and repeated until nothing moves anymore, so
+elements sized by their children settle within the frame instead of over several.
+The resolved rects are kept in flat arrays, which the display recursion reads instead
+of laying every element out again, and which elements draw at (UI._get_rect).
+
+A layout is solved again after the scale or offset changes, after any Location is
+edited, or after invalidate() - which the tree does itself when components change.
+Elements it doesn't know about, or whose scale changed under it, fall back to laying
+themselves out as before for the rest of the frame.
+"""
+
+
+# the laid out tree of one root
+class _Solution:
+    def __init__(self):
+        self.key = None
+        self.elements = []
+        self.rects = []  # resolved rects, what gets drawn
+        self.base_rects = []  # resolved base rects, the parent context of children
+        self.slots = {}  # id(element) : index in the arrays
+        self.content_sized = []  # elements that take their size from something else
+
+    def add(self, element):
+        self.slots[id(element)] = len(self.elements)
+        self.elements.append(element)
+        self.rects.append(element.location.resolve().copy())
+        self.base_rects.append(element.location.get_resolved_base_rect().copy())
+        if element.size_sources != ["location", "location"]:
+            self.content_sized.append(element)
+
+
+class layout:
+    enabled = False
+
+    # a solution for a tree stays good while this doesn't move
+    _generation = 0
+    # the solution of the root being displayed, if it's good
+    _current = None
+
+    # passes a solve may take for sizes to settle
+    MAX_PASSES = 4
+
+    @staticmethod
+    def enable() -> None:
+        """Lay out UI trees in one pass and reuse it until something changes."""
+        layout.enabled = True
+        layout.invalidate()
+
+    @staticmethod
+    def disable() -> None:
+        """Go back to every element laying itself out when displayed."""
+        layout.enabled = False
+        layout._current = None
+
+    @staticmethod
+    def invalidate() -> None:
+        """Solve every layout again on their next display."""
+        layout._generation += 1
+
+    @staticmethod
+    def _key():
+        return (
+            scale.get_scalar(),
+            tuple(scale.get_offset()),
+            layout._generation,
+            Location._edits,
+        )
+
+    # the solution of root's tree, solved again if anything changed since
+    @staticmethod
+    def _update(root) -> _Solution:
+        solution = root._layout_solution
+
+        if solution is not None and solution.key == layout._key():
+            # content changes (like new text) show up as location edits
+            for element in solution.content_sized:
+                element._check_size()
+
+            if solution.key == layout._key():
+                return solution
+
+        solution = layout._solve(root)
+        root._layout_solution = solution
+        return solution
+
+    @staticmethod
+    def _solve(root) -> _Solution:
+        for _ in range(layout.MAX_PASSES):
+            edits = Location._edits
+            solution = _Solution()
+            layout._walk(root, None, solution)
+            if Location._edits == edits:
+                break
+
+        solution.key = layout._key()
+        return solution
+
+    # lays out element and everything displayed under it, in display order
+    @staticmethod
+    def _walk(element, panel_dim, solution) -> None:
+        element._apply_layout(panel_dim)
+        solution.add(element)
+
+        if element.visible:
+            base_rect = element.location.get_resolved_base_rect()
+            for component in element.components:
+                component.parent_user_scale = element.user_scale
+                component.parent = element
+                layout._walk(component, base_rect, solution)
+
+    # index of element in the current solution, None if it has to lay itself out
+    @staticmethod
+    def _slot(element, scalar):
+        solution = layout._current
+        if solution is None:
+            return None
+
+        slot = solution.slots.get(id(element))
+        if (
+            slot is None
+            or solution.elements[slot] is not element
+            or element.scale != scalar
+        ):
+            # something the solve didn't see, like an element that was invisible
+            # the rest of the frame lays itself out, the next frame solves again
+            layout.invalidate()
+            layout._current = None
+            return None
+
+        return slot
@@ -0,0 +1,210 @@
+from contextlib import contextmanager
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+
+import prawcore
+
+"""
+Central scheduler every request to reddit goes through.
+
+ScheduledRequestor plugs into praw, so explicit fetches and praw's lazy attribute loads
+alike wait their turn here. Requests spend tokens from a bucket whose refill rate follows
+reddit's X-Ratelimit-Remaining / X-Ratelimit-Reset headers. When requests are waiting,
+the lowest lane goes first, so validating a username as it's typed never queues behind
+a background deep crawl. Identical GETs already in flight are coalesced into one.
+"""
+
+# lanes, lower goes first
+INTERACTIVE = 0
+ANALYSIS = 1
+BACKGROUND = 2
+
+_lane = contextvars.ContextVar("lane", default=ANALYSIS)
+
+
+def get_lane():
+    return _lane.get()
+
+
+# sets the lane for the current thread / task from here on
+def set_lane(lane):
+    _lane.set(lane)
+
+
+# sets the lane for the requests made inside the with block
+@contextmanager
+def lane(lane):
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+# an identical request already in flight, that later callers can wait on
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class RequestScheduler:
+    DEFAULT_RATE = 1.0  # requests per second until reddit's headers say otherwise
+    BURST = 10
+
+    def __init__(self, rate=DEFAULT_RATE, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+
+        self._waiting = []  # heap of (lane, ticket number)
+        self._tickets = itertools.count()
+        self._condition = threading.Condition()
+
+        self._in_flight = {}  # request key : _InFlight
+        self._in_flight_lock = threading.Lock()
+
+        # metrics
+        self.requests = 0
+        self.coalesced = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.lane_waits = {}  # lane : [requests, seconds waited]
+
+    # ------------------------------------------------------------------------------------------#
+    #                                        TOKEN BUCKET                                       #
+    # ------------------------------------------------------------------------------------------#
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._last_refill) * self.rate
+        )
+        self._last_refill = now
+
+    # blocks until this lane's request may go, returns the seconds spent waiting
+    def _acquire(self, lane):
+        start = time.monotonic()
+
+        with self._condition:
+            ticket = (lane, next(self._tickets))
+            heapq.heappush(self._waiting, ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiting))
+
+            while True:
+                self._refill()
+
+                if self._waiting[0] == ticket and self._tokens >= 1:
+                    heapq.heappop(self._waiting)
+                    self._tokens -= 1
+                    self._condition.notify_all()  # the next in line gets to check
+                    break
+
+                # first in line sleeps until the next token, the rest until notified
+                timeout = None
+                if self._waiting[0] == ticket:
+                    timeout = (1 - self._tokens) / self.rate
+                self._condition.wait(timeout)
+
+            # counted under the condition, requests come from many threads
+            waited = time.monotonic() - start
+            self.requests += 1
+            self.total_wait += waited
+            lane_wait = self.lane_waits.setdefault(lane, [0, 0.0])
+            lane_wait[0] += 1
+            lane_wait[1] += waited
+
+        return waited
+
+    # feeds reddit's ratelimit headers into the bucket
+    def update(self, headers):
+        if "x-ratelimit-remaining" not in headers:
+            return
+
+        remaining = float(headers["x-ratelimit-remaining"])
+        seconds_to_reset = max(float(headers.get("x-ratelimit-reset", 1)), 1)
+
+        with self._condition:
+            self._refill()
+            # spreads what's left evenly over the rest of the window
+            self.rate = max(remaining, 1) / seconds_to_reset
+            self._tokens = min(self._tokens, max(remaining, 0))
+            self._condition.notify_all()
+
+    # ------------------------------------------------------------------------------------------#
+    #                                         REQUESTS                                          #
+    # ------------------------------------------------------------------------------------------#
+
+    # runs request_function(method, url, **kwargs) once the budget allows it
+    def request(self, request_function, method, url, **kwargs):
+        if method.upper() != "GET":
+            return self._send(request_function, method, url, **kwargs)
+
+        key = (url, tuple(sorted((kwargs.get("params") or {}).items())))
+
+        with self._in_flight_lock:
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = _InFlight()
+                self._in_flight[key] = in_flight
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error:
+                raise in_flight.error
+            return in_flight.response
+
+        try:
+            in_flight.response = self._send(request_function, method, url, **kwargs)
+            return in_flight.response
+        except Exception as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+            in_flight.done.set()
+
+    def _send(self, request_function, method, url, **kwargs):
+        self._acquire(get_lane())
+        response = request_function(method, url, **kwargs)
+        self.update(response.headers)
+        return response
+
+    def get_stats(self):
+        with self._in_flight_lock:
+            coalesced = self.coalesced
+
+        with self._condition:
+            return {
+                "requests": self.requests,
+                "coalesced": coalesced,
+                "queue_depth": len(self._waiting),
+                "max_queue_depth": self.max_queue_depth,
+                "mean_wait": self.total_wait / self.requests if self.requests else 0.0,
+                "lane_waits": {
+                    lane: {"requests": num, "mean_wait": waited / num}
+                    for lane, (num, waited) in self.lane_waits.items()
+                },
+                "rate": self.rate,
+            }
+
+
+# prawcore requestor that routes every request through a RequestScheduler
+# praw.Reddit(requestor_class=ScheduledRequestor, requestor_kwargs={"scheduler": ...})
+class ScheduledRequestor(prawcore.Requestor):
+    def __init__(self, *args, scheduler, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scheduler = scheduler
+
+    def request(self, method, url, **kwargs):
+        return self.scheduler.request(super().request, method, url, **kwargs)
@@ -3,7 +3,12 @@
 
 class references:
     reddit = ""  # instance of reddit client used for the queries
+    scheduler = None  # ratelimit.RequestScheduler every request of reddit goes through
     redditor = ""  # the redditor being searched
     redditor_info = None  # info object for the redditor
+    analyses = None  # registry.AnalysisRegistry, shares analyses of the same redditor
+    analysis_cache = None  # cache.AnalysisCache of previous analyses, or None to disable
+    avatar_cache = None  # avatars.AvatarCache of downloaded profile pictures, or None
+    subreddit_cache = None  # subreddits.SubredditCache shared by every analysis, or None
 
     active_scenes = []
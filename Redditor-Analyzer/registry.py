@@ -0,0 +1,89 @@
+import threading
+import time
+
+import info
+import ratelimit
+
+"""
+Keeps track of every analysis in the process, keyed by username.
+
+Asking for a redditor that is already being analysed hands back the Info in flight
+instead of starting a second one, and a finished analysis is reused for a short while.
+Callers release an Info once nothing displays it anymore, and an analysis nobody holds
+is cancelled, so no requests are spent on results that would never be shown.
+"""
+
+
+class _Entry:
+    def __init__(self, redditor_info):
+        self.info = redditor_info
+        self.holders = 0
+        self.finished = None  # time it finished at, None while in flight
+
+
+class AnalysisRegistry:
+    MEMO_TTL = 60  # seconds a finished analysis is handed out again
+
+    def __init__(self):
+        self._analyses = {}  # (lowercase name, fetch_pic, history_depth) : _Entry
+        # reentrant, done callbacks of futures that already finished run on the spot
+        self._lock = threading.RLock()
+
+    # the Info for this redditor, shared with anyone else analysing them the same way
+    # arguments are the same as info.Info, every acquire needs a release
+    def acquire(
+        self,
+        redditor,
+        fetch_pic=True,
+        history_depth=info.HISTORY_DEPTH,
+        lane=ratelimit.ANALYSIS,
+    ):
+        key = (redditor.name.lower(), fetch_pic, history_depth)
+
+        with self._lock:
+            self._purge()
+
+            entry = self._analyses.get(key)
+            if entry is None:
+                entry = _Entry(info.Info(redditor, fetch_pic, history_depth, lane))
+                self._analyses[key] = entry
+                entry.info.future.add_done_callback(
+                    lambda future: self._finished(key, entry)
+                )
+
+            entry.holders += 1
+            return entry.info
+
+    # gives up on an Info from acquire, it is cancelled if nobody else holds it
+    def release(self, redditor_info):
+        with self._lock:
+            for key, entry in self._analyses.items():
+                if entry.info is redditor_info:
+                    break
+            else:
+                return  # failed or cancelled already, nothing left to do
+
+            entry.holders -= 1
+            if entry.holders <= 0 and entry.finished is None:
+                del self._analyses[key]
+                redditor_info.cancel()
+
+    def _finished(self, key, entry):
+        with self._lock:
+            entry.finished = time.time()
+
+            # failures aren't memoised, the next acquire tries again
+            if entry.info.future.cancelled() or entry.info.errors:
+                if self._analyses.get(key) is entry:
+                    del self._analyses[key]
+
+    # drops finished analyses once they are too old to hand out
+    # anyone still holding one keeps it, it just isn't shared anymore
+    def _purge(self):
+        now = time.time()
+        for key, entry in list(self._analyses.items()):
+            if entry.finished is not None and now - entry.finished > self.MEMO_TTL:
+                del self._analyses[key]
+
+    def __len__(self):
+        return len(self._analyses)
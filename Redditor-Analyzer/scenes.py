@@ -1,14 +1,14 @@
 from abc import ABC
-import threading
+import queue
 import time
 
 import pygame
-import praw
-import prawcore
 
 import pgx
 from reference import references
 import info
+import thumbnails
+import validation
 
 
 # Abstract base class
@@ -29,7 +29,7 @@ class EnterUsername(Scene):
                 pgx.Location([-10, -10, "width+20", "height+20"]), (255, 255, 255), 2
             ),
             length_limit=20,
-            allowed_chars="ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_",
+            allowed_chars=validation.USERNAME_CHARS,
         )
         self.status_box = self.input.get_components()[0]
 
@@ -39,19 +39,19 @@ class EnterUsername(Scene):
         self.input.add_component(self.status_text)
 
         self.last_text = self.input.text.text
-        self.users_valid = {}  # dictionary of usernames : validity
+        # results arrive in the background, the ui may be idling until then
+        self.validator = validation.UsernameValidator(on_result=pgx.time.wake)
 
     def run(self):
         text = self.input.text.text
 
         if text != self.last_text:
             self.last_text = text
-            checker = threading.Thread(
-                target=self._is_user_valid, args=(text,), daemon=True
-            )
-            checker.start()
+            self.validator.check(text)
+        elif self.validator.needs_check(text):
+            self.validator.check(text)
 
-        user_valid = False if text not in self.users_valid else self.users_valid[text]
+        user_valid = self.validator.is_valid(text)
         self.status_box.color = (0, 255, 0) if user_valid else (255, 0, 0)
         self.status_text.color = (0, 255, 0) if user_valid else (255, 0, 0)
 
@@ -59,42 +59,37 @@ class EnterUsername(Scene):
             "Press Space to Proceed" if user_valid else "This is not a real person"
         )
 
-        if (
-            text in self.users_valid
-            and self.users_valid[text] and
-            pgx.key.is_just_pressed(pygame.K_SPACE)
-        ):
-            references.redditor = references.reddit.redditor(text)
-            references.redditor_info = None
+        if user_valid and pgx.key.is_just_pressed(pygame.K_SPACE):
+            # reuses the redditor validation already loaded
+            references.redditor = self.validator.get_redditor(
+                text
+            ) or references.reddit.redditor(text)
             print(references.redditor.name)
-            info_getter = threading.Thread(target=info.Info)
-            info_getter.start()
+            # returns right away, the analysis runs on the shared loop
+            # pressing space again for the same person reuses the analysis in progress
+            redditor_info = references.analyses.acquire(references.redditor)
 
-            # removes old info displays
-            for i, scene in enumerate(references.active_scenes):
+            # removes old info displays, their analyses stop unless they're reused
+            for scene in references.active_scenes:
                 if isinstance(scene, DisplayInfo):
-                    del references.active_scenes[i]
+                    scene.close()
+            references.active_scenes = [
+                scene
+                for scene in references.active_scenes
+                if not isinstance(scene, DisplayInfo)
+            ]
 
             # adds a new info display
-            references.active_scenes.append(DisplayInfo())
+            references.active_scenes.append(DisplayInfo(redditor_info))
 
         self.input.display()
 
-    def _is_user_valid(self, name):
-        if len(name) > 2:  # usernames must be between 3 and 20 characters
-            try:
-                redditor = references.reddit.redditor(name)
-                redditor.id
-                self.users_valid[name] = True
-            except prawcore.exceptions.NotFound:
-                self.users_valid[name] = False
-            except AttributeError:
-                self.users_valid[name] = True
-
 
 class DisplayInfo(Scene):
-    def __init__(self):
-        self.info = references.redditor_info
+    # redditor_info is an info.Info acquired from references.analyses
+    def __init__(self, redditor_info):
+        self.info = redditor_info
+        references.redditor_info = redditor_info
 
         # UI elements
         self.pic = pgx.ui.ImageBox(
@@ -140,6 +135,10 @@ class DisplayInfo(Scene):
             pgx.Location([50, 440]),
             pgx.Text("Their most popular subreddit activity:", 20, color=(40, 40, 40)),
         )
+        self.busiest = pgx.ui.TextBox(
+            pgx.Location([50, 470]),
+            pgx.Text("Most active: ...", 20, color=(40, 40, 40)),
+        )
 
         self.entry_loading = pgx.ui.TextBox(
             pgx.Location(["right-10", "bottom-30"], "right"), pgx.Text("", 20)
@@ -157,73 +156,84 @@ class DisplayInfo(Scene):
             self.subs_frequented,
             self.subs_obscure,
             self.subs_popular,
+            self.busiest,
             self.entry_loading,
         )
 
-        self.karma_displayed = False
-        self.pic_displayed = False
-        self.age_displayed = False
-        self.last_activity_displayed = False
-        self.analysis_displayed = False
+        # the analysis announces new values as they arrive, see info.InfoEvent
+        self.events = self.info.subscribe(notify=pgx.time.wake)
+        self.handlers = {
+            info.AGE_READY: self._display_account_times,
+            info.PIC_READY: self._display_account_pic,
+            info.KARMA_READY: self._display_account_karma,
+            info.ACTIVITY_READY: self._display_account_activity,
+            info.SIZES_READY: self._display_account_analysis,
+            info.SUSPENDED: self._display_suspended,
+        }
+        self._display_available()
 
-    def run(self):
+    # hands the analysis back once this display is replaced
+    def close(self):
+        self.info.unsubscribe(self.events)
+        references.analyses.release(self.info)
+        if references.redditor_info is self.info:
+            references.redditor_info = None
+
+    # the analysis may have been going for a while (or be cached), shows what it has so far
+    def _display_available(self):
         if self.info.suspended:
-            self.panel.clear_components()
-            self.panel.add(
-                pgx.ui.TextBox(
-                    pgx.Location(["center", 200], "center"),
-                    pgx.Text("This account has most likely been suspended", 20),
-                )
-            )
+            self._display_suspended()
+            return
+
+        if self.info.age is not None:
+            self._display_account_times()
+        if self.info.profile_pic is not None:
+            self._display_account_pic()
+        if self.info.total_karma is not None:
+            self._display_account_karma()
+        if self.info.last_activity is not None:
+            self._display_account_activity()
+        elif self.info.entries is not None:
+            self._display_progress(len(self.info.entries))
 
-        else:
-            if (
-                self.info.link_karma != None
-                and self.info.total_karma != None
-                and self.info.comment_karma != None
-                and not self.karma_displayed
-            ):
-                self._display_account_karma()
-                self.karma_displayed = True
-
-            if self.info.profile_pic != None and not self.pic_displayed:
-                self._display_account_pic()
-                self.pic_displayed = True
-
-            if (
-                self.info.created_date != None
-                and self.info.age != None
-                and not self.age_displayed
-            ):
-                self._display_account_times()
-                self.age_displayed = True
-
-            if self.info.last_activity != None and not self.last_activity_displayed:
-                self._display_account_last_active()
-                self.last_activity_displayed = True
-
-            if (
-                self.info.subreddit_activity != None
-                and self.info.subreddit_size != None
-                and self.info.num_posts != None
-                and self.info.num_comments != None
-                and not self.analysis_displayed
-            ):
-                self._display_account_analysis()
-                self.analysis_displayed = True
-                self.entry_loading.visible = False
-
-            if not self.analysis_displayed:
-                try:
-                    num_events = len(self.info.entries)
-                except:
-                    num_events = 0
-                self.entry_loading.text.text = f"Processing Events: {num_events}"
+    def run(self):
+        # nothing to do until the analysis has something new
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+
+            if event.type == info.ACTIVITY_PROGRESS:
+                self._display_progress(event.data)
+            else:
+                self.handlers[event.type]()
 
         self.panel.display()
 
+    def _display_suspended(self):
+        self.panel.clear_components()
+        self.panel.add(
+            pgx.ui.TextBox(
+                pgx.Location(["center", 200], "center"),
+                pgx.Text("This account has most likely been suspended", 20),
+            )
+        )
+
+    def _display_progress(self, num_events):
+        if self.entry_loading.visible:
+            self.entry_loading.text.text = f"Processing Events: {num_events}"
+
+    def _display_account_activity(self):
+        self._display_account_last_active()
+        self._display_account_analysis()
+
     def _display_account_pic(self):
-        self.pic.image = pygame.transform.scale(self.info.profile_pic, (128, 128))
+        url = self.info.profile_pic_url
+        pic = self.info.profile_pic
+
+        # the thumbnail cache scales it once per ui scale, ImageBox uses those as is
+        self.pic.scaler = lambda scale: thumbnails.get(url, pic, (128, 128), scale)
 
     # timedelta -> string days and years
     def _format_dates(self, age):
@@ -258,14 +268,8 @@ class DisplayInfo(Scene):
         else:
             str_time = self._format_dates(last_activity["time"])
             str_time = "today" if str_time == "" else str_time + " ago"
-            act_type = (
-                "post"
-                if isinstance(
-                    last_activity["item"], praw.models.reddit.submission.Submission
-                )
-                else "comment"
-            )
-            act_sub = last_activity["item"].subreddit.display_name
+            act_type = last_activity["type"]
+            act_sub = last_activity["subreddit"]
             self.last_activity.text.text = (
                 f"Last Active: {str_time}, with a {act_type} in r/{act_sub}"
             )
@@ -306,14 +310,24 @@ class DisplayInfo(Scene):
         )
         self.karma.text.color = (0, 0, 0)
 
+    # needs both the activity and the subreddit sizes
     def _display_account_analysis(self):
-        self.section.text.text = (
-            f"Over the last 250 actions, u/{references.redditor.name}:"
-        )
-        self.section.text.color = (0, 0, 0)
+        if self.info.subreddit_activity is None or self.info.subreddit_size is None:
+            return
+        self.entry_loading.visible = False
 
         posts = self.info.num_posts
         comments = self.info.num_comments
+
+        # past one listing's worth the entries also come from top and controversial
+        if self.info.history_depth <= info.LISTING_LIMIT:
+            over = f"Over the last {posts + comments} actions"
+        else:
+            over = f"Over {posts + comments} of their actions"
+
+        self.section.text.text = f"{over}, u/{references.redditor.name}:"
+        self.section.text.color = (0, 0, 0)
+
         self.posts_comments.text.text = f"Has posted {posts} time{'s' if posts != 1 else ''}, and commented {comments} time{'s' if comments != 1 else ''}"
         self.posts_comments.text.color = (0, 0, 0)
 
@@ -321,10 +335,9 @@ class DisplayInfo(Scene):
         freqsubs = "Their frequented subreddits:"
         if not activity:
             freqsubs += " None"
-        for _ in range(2):
-            if activity:
-                sub, num = activity.pop()
-                freqsubs += f" r/{sub.display_name} {num} time{'s' if num > 1 else ''}"
+        # the two most frequented, activity is sorted ascending
+        for sub, num in activity[:-3:-1]:
+            freqsubs += f" r/{sub.display_name} {num} time{'s' if num > 1 else ''}"
         self.subs_frequented.text.text = freqsubs
         self.subs_frequented.text.color = (0, 0, 0)
 
@@ -339,7 +352,15 @@ class DisplayInfo(Scene):
             popular[1] = self._format_nums(popular[1])
             popular = f" r/{popular[0].display_name} ({popular[1]} subs)"
 
-        self.subs_obscure.text.text += obscure
+        self.subs_obscure.text.text = "Their most obscure subreddit activity:" + obscure
         self.subs_obscure.text.color = (0, 0, 0)
-        self.subs_popular.text.text += popular
+        self.subs_popular.text.text = "Their most popular subreddit activity:" + popular
         self.subs_popular.text.color = (0, 0, 0)
+
+        busiest = self.info.busiest_time
+        if busiest:
+            weekday, hour = busiest
+            self.busiest.text.text = f"Most active: {weekday}s around {hour:02}:00 UTC"
+        else:
+            self.busiest.text.text = "Most active: Never"
+        self.busiest.text.color = (0, 0, 0)
@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from itertools import islice
+import json
+import os
+import threading
+import time
+
+"""
+Resolves subreddit metadata (subscriber counts) in bulk.
+
+Letting praw lazily load `sub.subscribers` costs one about page request per subreddit.
+Reddit's /api/info endpoint takes a comma separated list of up to 100 fullnames,
+so every subreddit a redditor touched can be resolved in one or two requests.
+
+All requests go through the praw client handed in, so pointing praw's
+`oauth_url` / `reddit_url` settings at a local fake server exercises this as well.
+
+Subreddit sizes change slowly, so they are kept in a SubredditCache shared by every
+analysis in the process, optionally saved to disk between runs. Saving rewrites the
+whole file, so it happens at most every SAVE_INTERVAL while analysing, and at exit.
+"""
+
+# maximum number of fullnames reddit accepts in a single /api/info request
+API_INFO_LIMIT = 100
+
+
+# splits an iterable into lists of at most size n
+def _chunk(iterable, n):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, n))
+        if not chunk:
+            return
+        yield chunk
+
+
+# reddit is a praw.Reddit instance, fullnames an iterable of subreddit fullnames (t5_xxxxx)
+# cache is an optional SubredditCache, only the subreddits it misses are requested
+# returns a dictionary of fullname : subscriber count
+# subreddits reddit doesn't return (banned, deleted) are left out
+def resolve_subscribers(reddit, fullnames, cache=None):
+    fullnames = list(dict.fromkeys(fullnames))  # deduplicates, keeps order
+    subscribers = {}
+
+    if cache:
+        subscribers, fullnames = cache.get_many(fullnames)
+
+    fetched = {}
+    for chunk in _chunk(fullnames, API_INFO_LIMIT):
+        # a chunk never exceeds the API limit, so praw makes exactly one request for it
+        for sub in reddit.info(fullnames=chunk):
+            if getattr(sub, "subscribers", None) is not None:
+                fetched[sub.fullname] = sub.subscribers
+
+    if cache and fetched:
+        cache.put_many(fetched)
+        cache.save_if_due()
+
+    subscribers.update(fetched)
+    return subscribers
+
+
+# process wide LRU of subreddit fullname : (subscribers, fetched timestamp)
+class SubredditCache:
+    DEFAULT_TTL = 7 * 24 * 60 * 60  # subscriber counts barely move within a week
+    DEFAULT_MAX_ENTRIES = 50000
+    SAVE_INTERVAL = 5 * 60  # seconds between saves by save_if_due()
+
+    def __init__(self, filepath=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.filepath = filepath
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False  # changed since it was loaded or saved
+        self._last_save = time.time()
+
+        if self.filepath:
+            self.load()
+
+    # returns ({fullname: subscribers} for fresh entries, [fullnames that missed])
+    def get_many(self, fullnames):
+        found = {}
+        missing = []
+        now = time.time()
+
+        with self._lock:
+            for fullname in fullnames:
+                entry = self._entries.get(fullname)
+
+                if entry is not None and now - entry[1] <= self.ttl:
+                    self._entries.move_to_end(fullname)
+                    found[fullname] = entry[0]
+                    self.hits += 1
+                else:
+                    missing.append(fullname)
+                    self.misses += 1
+
+        return found, missing
+
+    def put_many(self, subscribers):
+        now = time.time()
+
+        with self._lock:
+            for fullname, count in subscribers.items():
+                self._entries[fullname] = (count, now)
+                self._entries.move_to_end(fullname)
+            self._dirty = True
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def load(self):
+        try:
+            with open(self.filepath, "r") as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        now = time.time()
+        with self._lock:
+            # saved oldest to newest, so the LRU order survives the round trip
+            for fullname, count, fetched in entries:
+                if now - fetched <= self.ttl:
+                    self._entries[fullname] = (count, fetched)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # saves if anything changed and the last save was SAVE_INTERVAL ago
+    def save_if_due(self):
+        if self._dirty and time.time() - self._last_save >= self.SAVE_INTERVAL:
+            self.save()
+
+    # saves if anything changed since the last save, call it before exiting
+    def save(self):
+        if not self.filepath:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = [
+                [fullname, count, fetched]
+                for fullname, (count, fetched) in self._entries.items()
+            ]
+            self._dirty = False
+            self._last_save = time.time()
+
+        directory = os.path.dirname(self.filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temppath = f"{self.filepath}.{threading.get_ident()}.tmp"
+        try:
+            with open(temppath, "w") as file:
+                json.dump(entries, file)
+            os.replace(temppath, self.filepath)
+        except OSError:
+            self._dirty = True  # the next save tries again
+            raise
@@ -0,0 +1,57 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import threading
+
+"""
+One asyncio event loop, running in a single background thread, that every analysis shares.
+
+Analyses are written as coroutines and scheduled with submit(), which hands back a
+concurrent.futures.Future the pygame loop can poll without blocking.
+praw is synchronous, so its network calls go through blocking(), which runs them on
+one small shared thread pool instead of a new thread per call.
+"""
+
+MAX_WORKERS = 8
+
+_loop = None
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_loop():
+    global _loop, _executor
+
+    with _lock:
+        if _loop is None:
+            _executor = ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix="reddit")
+
+            _loop = asyncio.new_event_loop()
+            _loop.set_default_executor(_executor)
+
+            thread = threading.Thread(
+                target=_loop.run_forever, name="analysis loop", daemon=True
+            )
+            thread.start()
+
+    return _loop
+
+
+# changes the size of the shared pool, only has an effect before the first submit()
+def set_max_workers(workers):
+    global MAX_WORKERS
+    MAX_WORKERS = workers
+
+
+# schedules a coroutine on the shared loop, returns a concurrent.futures.Future
+def submit(coroutine):
+    return asyncio.run_coroutine_threadsafe(coroutine, _get_loop())
+
+
+# awaitable that runs a blocking function on the shared pool
+# it runs in a copy of the caller's context, so things like ratelimit lanes carry over
+def blocking(function, *args):
+    context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(
+        None, context.run, function, *args
+    )
@@ -0,0 +1,88 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import info
+
+"""
+A local stand-in for the parts of reddit's api the tests use.
+
+praw is pointed at it through its oauth_url / reddit_url settings, so requests go
+through the same client code as they do against reddit. Every /api/info request
+is recorded with the fullnames it asked for.
+"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, obj, status=200):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # praw asks for an application only token before anything else
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send(
+            {
+                "access_token": "token",
+                "expires_in": 3600,
+                "scope": "*",
+                "token_type": "bearer",
+            }
+        )
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/api/info":
+            self._send({"error": 404}, 404)
+            return
+
+        fullnames = parse_qs(url.query)["id"][0].split(",")
+        self.server.fake.info_requests.append(fullnames)
+
+        children = [
+            {
+                "kind": "t5",
+                "data": {
+                    "id": fullname[3:],
+                    "name": fullname,
+                    "display_name": self.server.fake.subreddits[fullname][0],
+                    "subscribers": self.server.fake.subreddits[fullname][1],
+                },
+            }
+            for fullname in fullnames
+            if fullname in self.server.fake.subreddits
+        ]
+        self._send({"kind": "Listing", "data": {"children": children, "after": None}})
+
+
+# with FakeReddit(subreddits) as fake: ... fake.reddit() is a client talking to it
+# subreddits is a dictionary of fullname : (display name, subscribers)
+class FakeReddit:
+    def __init__(self, subreddits):
+        self.subreddits = subreddits
+        self.info_requests = []  # the fullnames of each /api/info request, in order
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.fake = self
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reddit(self):
+        url = f"http://127.0.0.1:{self._server.server_port}"
+        return info.create_reddit(
+            oauth_url=url, reddit_url=url, check_for_updates=False
+        )
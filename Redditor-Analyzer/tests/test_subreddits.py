@@ -0,0 +1,51 @@
+import unittest
+
+import subreddits
+from tests.fake_reddit import FakeReddit
+
+SUBREDDITS = {f"t5_{i:x}": (f"sub{i}", i * 10) for i in range(1, 400)}
+
+
+class ResolveSubscribersTest(unittest.TestCase):
+    def test_one_request_per_hundred_fullnames(self):
+        fullnames = list(SUBREDDITS)[:250]
+
+        with FakeReddit(SUBREDDITS) as fake:
+            sizes = subreddits.resolve_subscribers(fake.reddit(), fullnames)
+
+        self.assertEqual([len(ids) for ids in fake.info_requests], [100, 100, 50])
+        self.assertEqual(sum(fake.info_requests, []), fullnames)
+        self.assertEqual(sizes, {f: SUBREDDITS[f][1] for f in fullnames})
+
+    def test_duplicates_requested_once(self):
+        fullnames = list(SUBREDDITS)[:60] * 2
+
+        with FakeReddit(SUBREDDITS) as fake:
+            sizes = subreddits.resolve_subscribers(fake.reddit(), fullnames)
+
+        self.assertEqual(fake.info_requests, [list(SUBREDDITS)[:60]])
+        self.assertEqual(len(sizes), 60)
+
+    def test_missing_subreddits_left_out(self):
+        fullnames = ["t5_1", "t5_gone", "t5_2"]
+
+        with FakeReddit(SUBREDDITS) as fake:
+            sizes = subreddits.resolve_subscribers(fake.reddit(), fullnames)
+
+        self.assertEqual(len(fake.info_requests), 1)
+        self.assertEqual(sizes, {"t5_1": 10, "t5_2": 20})
+
+    def test_cached_subreddits_not_requested(self):
+        cache = subreddits.SubredditCache()
+        cache.put_many({f: SUBREDDITS[f][1] for f in list(SUBREDDITS)[:150]})
+        fullnames = list(SUBREDDITS)[:250]
+
+        with FakeReddit(SUBREDDITS) as fake:
+            sizes = subreddits.resolve_subscribers(fake.reddit(), fullnames, cache)
+
+        self.assertEqual(fake.info_requests, [list(SUBREDDITS)[150:250]])
+        self.assertEqual(len(sizes), 250)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+from collections import OrderedDict
+import threading
+
+import pygame
+
+"""
+Ready to blit avatar thumbnails.
+
+Each avatar is converted and smooth scaled once per (url, size, ui scale), and kept
+in a small LRU, so flipping between results or resizing the window back and forth
+reuses surfaces instead of rescaling full size pictures every time.
+"""
+
+MAX_THUMBNAILS = 32
+
+_thumbnails = OrderedDict()  # (url, size, scale) : pygame.Surface
+_lock = threading.Lock()
+
+
+# picture is the decoded full size avatar, size the unscaled thumbnail size
+def get(url, picture, size, scale):
+    key = (url, tuple(size), scale)
+
+    with _lock:
+        if key in _thumbnails:
+            _thumbnails.move_to_end(key)
+            return _thumbnails[key]
+
+    # smoothscale only works on 24 and 32 bit surfaces
+    if picture.get_bitsize() not in (24, 32):
+        picture = picture.convert(32)
+
+    scaled_size = [max(round(dimension * scale), 1) for dimension in size]
+    thumbnail = pygame.transform.smoothscale(picture, scaled_size).convert()
+
+    with _lock:
+        _thumbnails[key] = thumbnail
+        while len(_thumbnails) > MAX_THUMBNAILS:
+            _thumbnails.popitem(last=False)
+
+    return thumbnail
@@ -0,0 +1,130 @@
+import asyncio
+from collections import OrderedDict
+import string
+import threading
+import time
+
+import prawcore
+
+import ratelimit
+from reference import references
+import tasks
+
+"""
+Checks whether usernames exist while they're being typed.
+
+Lookups wait out a short debounce window and get cancelled when the text changes again,
+so typing a whole name costs one request instead of one per keystroke.
+Results, positive and negative, are kept in a small LRU with their own time to live.
+The fetched redditor is kept too, so the analysis can reuse it instead of loading it again.
+"""
+
+USERNAME_CHARS = set(string.ascii_letters + string.digits + "-_")
+USERNAME_MIN_LENGTH = 3
+USERNAME_MAX_LENGTH = 20
+
+
+# whether a name could be a username at all, without asking reddit
+def is_plausible(name):
+    return USERNAME_MIN_LENGTH <= len(name) <= USERNAME_MAX_LENGTH and all(
+        char in USERNAME_CHARS for char in name
+    )
+
+
+class UsernameValidator:
+    DEBOUNCE = 0.3  # seconds the text has to stay the same before a lookup
+    VALID_TTL = 10 * 60
+    INVALID_TTL = 60  # a free name could get registered, so negatives expire sooner
+    MAX_ENTRIES = 256
+    RETRY_DELAY = 5  # seconds before a lookup that failed (not NotFound) is tried again
+
+    # on_result is called (from the analysis loop's thread) whenever a lookup finishes
+    def __init__(self, on_result=None):
+        self._results = OrderedDict()  # lowercase name : (valid, redditor, checked at)
+        self._lock = threading.Lock()
+        self._pending = None  # future of the lookup in progress
+        self._retry_at = 0  # no lookups again before this, after one failed
+        self.on_result = on_result
+
+    # call whenever the text changes, supersedes the lookup in progress
+    def check(self, name):
+        if self._pending:
+            self._pending.cancel()
+            self._pending = None
+
+        if not is_plausible(name) or self.is_valid(name) is not None:
+            return
+
+        self._pending = tasks.submit(self._lookup(name))
+
+    # call while the name stays the same, whether it has to be looked up again,
+    # because its result expired or its lookup failed
+    def needs_check(self, name):
+        if not is_plausible(name) or self.is_checking():
+            return False
+
+        return self.is_valid(name) is None and time.time() >= self._retry_at
+
+    def is_checking(self):
+        return self._pending is not None and not self._pending.done()
+
+    # True / False once known, None while unknown or still being looked up
+    def is_valid(self, name):
+        if not is_plausible(name):
+            return False
+
+        result = self._get(name)
+        return None if result is None else result[0]
+
+    # the already loaded redditor for a valid name, or None
+    def get_redditor(self, name):
+        result = self._get(name)
+        return None if result is None else result[1]
+
+    def _get(self, name):
+        key = name.lower()
+
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                return None
+
+            valid, _, checked = result
+            ttl = self.VALID_TTL if valid else self.INVALID_TTL
+            if time.time() - checked > ttl:
+                del self._results[key]
+                return None
+
+            self._results.move_to_end(key)
+            return result
+
+    def _put(self, name, valid, redditor):
+        with self._lock:
+            self._results[name.lower()] = (valid, redditor, time.time())
+            self._results.move_to_end(name.lower())
+
+            while len(self._results) > self.MAX_ENTRIES:
+                self._results.popitem(last=False)
+
+    async def _lookup(self, name):
+        # cancelled here if another keystroke comes in first
+        await asyncio.sleep(self.DEBOUNCE)
+
+        # someone is waiting on this, it goes ahead of any analysis
+        ratelimit.set_lane(ratelimit.INTERACTIVE)
+
+        redditor = references.reddit.redditor(name)
+        try:
+            await tasks.blocking(getattr, redditor, "id")
+            self._put(name, True, redditor)
+        except prawcore.exceptions.NotFound:
+            self._put(name, False, None)
+        except AttributeError:
+            # suspended accounts exist, they just don't have an id
+            self._put(name, True, redditor)
+        except Exception:
+            # like a network error, it's unknown still and gets retried (see needs_check)
+            self._retry_at = time.time() + self.RETRY_DELAY
+
+        if self.on_result:
+            self.on_result()